@@ -1,10 +1,22 @@
 import os
 import shutil
 import datetime
+import glob
+import itertools
 import re
 import subprocess
 import logging
 import json
+import shlex
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson # Optional: faster indented JSON reports
+except ImportError:
+    orjson = None
 
 # --- Configuration ---
 # Base directory for all evaluation runs
@@ -17,24 +29,52 @@ AI_OUTPUT_FILENAME = "ai_generated_drivers.txt"
 TEMPLATE_MAKEFILE = "template_Makefile"
 
 # Path to the checkpatch.pl script - IMPROVED LOGIC
-# Auto-detect checkpatch.pl if not defined
-CHECKPATCH_SCRIPT = shutil.which("checkpatch.pl")
-# If not found in PATH, try common kernel source paths (adjust these for your system)
-if not CHECKPATCH_SCRIPT:
-    # Common kernel source paths for checkpatch.pl
-    possible_paths = [
-        "/usr/src/linux/scripts/checkpatch.pl",
-        "/usr/src/linux-headers-*/scripts/checkpatch.pl", # For Ubuntu/Debian
-        os.path.expanduser("~/linux/scripts/checkpatch.pl"),
-        os.path.expanduser("~/kernel/scripts/checkpatch.pl"),
-    ]
-    for path in possible_paths:
+# Common kernel source paths for checkpatch.pl (adjust these for your system)
+CHECKPATCH_SEARCH_PATHS = [
+    "/usr/src/linux/scripts/checkpatch.pl",
+    "/usr/src/linux-headers-*/scripts/checkpatch.pl", # For Ubuntu/Debian
+    os.path.expanduser("~/linux/scripts/checkpatch.pl"),
+    os.path.expanduser("~/kernel/scripts/checkpatch.pl"),
+]
+
+
+def find_checkpatch_script():
+    """
+    Auto-detects checkpatch.pl, first in PATH and then in common kernel source paths.
+
+    Returns:
+        str or None: Path to checkpatch.pl, or None if it was not found.
+    """
+    script = shutil.which("checkpatch.pl")
+    if script:
+        return script
+    for path in CHECKPATCH_SEARCH_PATHS:
         # Use glob to handle wildcards like linux-headers-*
-        import glob
         found_paths = glob.glob(path)
         if found_paths:
-            CHECKPATCH_SCRIPT = found_paths[0] # Take the first match
-            break
+            return found_paths[0] # Take the first match
+    return None
+
+
+CHECKPATCH_SCRIPT = find_checkpatch_script()
+# Checked once per run; the script does not appear or lose its exec bit mid-run
+CHECKPATCH_AVAILABLE = bool(CHECKPATCH_SCRIPT) and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK)
+
+# Optional compiler cache. When ccache's masquerade directory (symlinks named after each
+# installed compiler, e.g. gcc-13 or x86_64-linux-gnu-gcc-13) exists, it is put first on PATH
+# for module builds, so the compiler the kernel was configured with still runs, through ccache.
+# Objects are cached across runs in CCACHE_DIR.
+CCACHE_MASQUERADE_PATHS = ["/usr/lib/ccache", "/usr/lib64/ccache"]
+CCACHE_MASQUERADE_DIR = next((path for path in CCACHE_MASQUERADE_PATHS if os.path.isdir(path)), None)
+CCACHE_DIR = os.path.abspath(os.path.join(BASE_EVAL_DIR, ".ccache"))
+
+# clang-tidy is skipped for drivers with more compilation errors than this
+CLANG_TIDY_MAX_COMPILE_ERRORS = 20
+
+# Optional clang-tidy result cache (ctcache). When installed, clang-tidy runs through it so
+# re-evaluating an unchanged driver reuses the stored diagnostics.
+CLANG_TIDY_CACHE = shutil.which("clang-tidy-cache")
+CLANG_TIDY_CACHE_DIR = os.path.expanduser("~/.cache/eval_drivers/clang-tidy")
 
 # Define the expected order and mapping of scenarios for parsing and category assignment
 SCENARIO_MAP = [
@@ -45,6 +85,194 @@ SCENARIO_MAP = [
     {"tag": "hello_module", "filename": "hello_module.c", "category": "generic_kernel_module"}
 ]
 
+# Module name quoted in the printk example of the fine-tuning suggestions
+EXAMPLE_MODULE_NAME = SCENARIO_MAP[0]["filename"].split(".")[0]
+
+# Messages each category's module must print on load/unload, prefixed with "<module name>: "
+EXPECTED_MODULE_MESSAGES = {
+    "char_device_basic_rw": ("device registered", "device unregistered"),
+    "char_device_ioctl_sync": ("device registered", "device unregistered"),
+    "platform_device_gpio_irq": ("platform driver loaded", "platform driver unloaded"),
+    "char_device_procfs": ("procfs entry created", "procfs entry removed"),
+    "generic_kernel_module": ("Hello World!", "Goodbye, World!"),
+}
+
+# Score weights and starting sub-scores; evaluate_driver() copies this and fills in the measured values
+DEFAULT_DETAILED_METRICS = {
+    "correctness": {
+        "weight": 0.4,
+        "compilation_success": 0.0,
+        "functionality_pass": 0.0,
+        "kernel_api_usage": 1.0 
+    },
+    "security_safety": {
+        "weight": 0.25,
+        "memory_safety": 1.0, 
+        "resource_management": 1.0, 
+        "race_conditions": 1.0, 
+        "input_validation": 1.0 
+    },
+    "code_quality": {
+        "weight": 0.2,
+        "style_compliance": 1.0, 
+        "error_handling": 1.0, 
+        "documentation": 0.7, 
+        "maintainability": 0.8 
+    },
+    "performance": {
+        "weight": 0.1,
+        "efficiency": 0.75, 
+        "scalability": 0.6, 
+        "memory_usage": 0.75 
+    },
+    "advanced_features": {
+        "weight": 0.05,
+        "power_management": 0.5, 
+        "device_tree_support": 0.4, 
+        "debug_support": 0.9 
+    }
+}
+# (category, weight, sub-criteria keys) for the overall score, derived once from the skeleton above
+SCORE_SCHEMA = tuple(
+    (category_name, scores["weight"], tuple(key for key in scores if key != "weight"))
+    for category_name, scores in DEFAULT_DETAILED_METRICS.items()
+)
+
+# --- Precompiled Patterns ---
+# A whole driver block in the AI output file: "// START:<tag>" ... "// END:<tag>".
+# Group 1 is the tag, group 2 the code lines between the delimiter lines. The code may not
+# contain another START line: a later START starts a new block, as in a line-by-line scan.
+# Compiled as bytes so it can scan an mmap of the file directly.
+DRIVER_BLOCK_RE = re.compile(
+    rb'^[ \t]*//[ \t]*START:([a-zA-Z0-9_\-]+)[ \t\r]*\n'
+    rb'((?:(?![ \t]*//[ \t]*START:[a-zA-Z0-9_\-]+[ \t\r]*$)[^\n]*\n)*?)'
+    rb'[ \t]*//[ \t]*END:\1[ \t\r]*$',
+    re.MULTILINE
+)
+# An END line for some other tag inside a block; it is dropped from the code
+STRAY_END_LINE_RE = re.compile(rb'^[ \t]*//[ \t]*END:[a-zA-Z0-9_\-]+[ \t\r]*\n', re.MULTILINE)
+# Per-line classifiers for streamed tool output (see run_command_streaming)
+# Lines that also mention warning: are excluded by is_compile_error_line(), not by a lookahead
+COMPILE_ERROR_LINE_RE = re.compile(r':\s*(?:error|fatal error):', re.IGNORECASE)
+COMPILE_WARNING_LINE_RE = re.compile(r':\d+:\d+:\s*warning:', re.IGNORECASE)
+CLANG_TIDY_ISSUE_LINE_RE = re.compile(r'^\s*\S+:\d+:\d+:\s*(warning|error):', re.IGNORECASE)
+# clang-tidy scoring patterns, written in lowercase and matched against the lowercased
+# output once, instead of case-folding each scan with re.IGNORECASE
+API_MISUSE_RE = re.compile(r'linuxkernel-.*:')
+MEMORY_SAFETY_RE = re.compile(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureapi\.memcpy|memory leak')
+RESOURCE_MGMT_RE = re.compile(r'resource leak|unhandled return value')
+RACE_CONDITION_RE = re.compile(r'concurrency-.*|race condition')
+INPUT_VALIDATION_RE = re.compile(r'clang-analyzer-security.insecureapi|buffer-overflow|bounds check')
+ERROR_HANDLING_RE = re.compile(r'error handling|return value ignored')
+# dmesg checks used by the functional test
+LOAD_FAILURE_RE = re.compile(
+    r'insmod: ERROR:|No such file or directory|Invalid module format|unresolved symbol|'
+    r'Unknown symbol|kernel panic|oops|tainted',
+    re.IGNORECASE
+)
+KERNEL_OOPS_RE = re.compile(r'kernel (panic|oops|bug):', re.IGNORECASE)
+UNLOAD_PROBLEM_RE = re.compile(r'rmmod: ERROR:|fail|error|Device or resource busy', re.IGNORECASE)
+# Most dmesg output kept per functional-test stage; a module that floods the log keeps its
+# last messages (where an oops trace ends up) instead of pushing megabytes through the pipe
+DMESG_TAIL_BYTES = 1 << 16
+# Run by the root shell as: sh -c DMESG_SINCE_SCRIPT dmesg-since <mark> <show> <max bytes>.
+# Filters dmesg by its monotonic "[seconds.micros]" stamps so only the last <max bytes> of the
+# records newer than <mark> cross the pipe (none when <show> is 0), and prints the log's last
+# stamp, the next mark, to stderr.
+DMESG_SINCE_SCRIPT = (
+    'dmesg | awk -v mark="$1" -v show="$2" \''
+    'match($0, /^\\[ *[0-9]+\\.[0-9]+\\]/) { stamp = substr($0, RSTART + 1, RLENGTH - 2); '
+    'sub(/^ +/, "", stamp); seen = 1; if (stamp + 0 > mark + 0) new = 1 } '
+    'new && show { print } '
+    'END { print (seen ? stamp : mark) > "/dev/stderr" }\' | tail -c "$3"'
+)
+# checkpatch.pl spacing/indentation complaints, matched without lowercasing the output
+CHECKPATCH_SPACING_RE = re.compile(r'spacing|indentation', re.IGNORECASE)
+# Every clang-tidy phrase the fine-tuning suggestions react to, found in one scan
+CLANG_TIDY_SUGGESTION_KEYWORDS = (
+    "unhandled return value", "null check", "resource leak", "not freed",
+    "concurrency", "race condition", "shared data", "use after free"
+)
+CLANG_TIDY_SUGGESTION_KEYWORDS_RE = re.compile(
+    '|'.join(map(re.escape, CLANG_TIDY_SUGGESTION_KEYWORDS)), re.IGNORECASE
+)
+# Keywords (lowercase) that trigger each clang-tidy suggestion
+ERROR_HANDLING_KEYWORDS = frozenset({"unhandled return value", "null check"})
+RESOURCE_LEAK_KEYWORDS = frozenset({"resource leak", "not freed"})
+CONCURRENCY_KEYWORDS = frozenset({"concurrency", "race condition", "shared data"})
+
+# --- Report Settings ---
+# Tool outputs longer than twice this many characters are cut to their head and tail in the JSON reports
+TOOL_OUTPUT_REPORT_CHARS = 4096
+# Per-driver log files holding the full output of each tool, by metrics section
+TOOL_OUTPUT_LOGS = {
+    "compilation": "make.log",
+    "style": "checkpatch.log",
+    "static_analysis": "clang_tidy.log",
+}
+
+# One row of the results table printed at the end of a run
+RESULTS_ROW_FORMAT = "| {:<18} | {:<24} | {:<7} | {:<11} | {:<11} | {:<9} | {:<5} |"
+
+# --- AI Prompt Instructions ---
+# Joined once at import so print_ai_prompt_instructions() emits them in a single write
+AI_PROMPT_INSTRUCTIONS = "\n".join([
+    "\n" + "="*80,
+    "                      Linux Device Driver AI Evaluation System",
+    "="*80,
+    "Step 1: Prompt your AI model with the following:",
+    "\n--- AI PROMPT TO USE (Copy-Paste and Modify as needed) ---",
+    "Generate exactly 5 distinct Linux kernel modules in C, each representing one scenario described below.",
+    "Each module's code block should be explicitly delimited by comments of the format:",
+    "    // START:<unique_scenario_tag>",
+    "    // ... C code for the module ...",
+    "    // END:<same_tag>",
+    "Do NOT include file name comments or excessive text between modules. Ensure NO Markdown fences (` ```c `) are used.",
+    "Adhere strictly to Linux kernel coding standards (e.g., 80-char line limit, tab indentation, specific brace style).",
+    "Ensure robust error handling for all kernel API calls.",
+    "Ensure all allocated resources are properly freed in error paths and the module exit function.",
+    "Include necessary printk messages at KERN_INFO level for module load and unload events, precisely matching the specified strings below.",
+    "List the modules in this exact order:",
+    # Detailed instructions for each scenario, matching SCENARIO_MAP order
+    "\n1. char_rw.c (Scenario Tag: char_rw)",
+    "    * A basic character device driver that supports read and write operations.",
+    "    * Required printk on load: \"char_rw: device registered\"",
+    "    * Required printk on unload: \"char_rw: device unregistered\"",
+    "\n2. char_ioctl_sync.c (Scenario Tag: char_ioctl_sync)",
+    "    * A character device driver that demonstrates `ioctl` with synchronous operations.",
+    "    * Required printk on load: \"char_ioctl_sync: device registered\"",
+    "    * Required printk on unload: \"char_ioctl_sync: device unregistered\"",
+    "\n3. platform_gpio_irq.c (Scenario Tag: platform_gpio_irq)",
+    "    * A platform device driver that interacts with GPIOs and handles interrupts (e.g., simple button press).",
+    "    * Required printk on load: \"platform_gpio_irq: platform driver loaded\"",
+    "    * Required printk on unload: \"platform_gpio_irq: platform driver unloaded\"",
+    "    * CRITICAL GUIDELINES for successful compilation and execution:",
+    "        - MUST use modern GPIO descriptor API: `devm_gpiod_get()` and `gpiod_to_irq()`",
+    "        - DO NOT use deprecated functions like `of_get_named_gpio()` or legacy `gpio_*()` APIs",
+    "        - Must support Device Tree via `of_match_table` and use `irq-gpios` phandle in DT",
+    "        - Ensure `platform_probe()` returns `int`, and `platform_remove()` returns `int` or `void`",
+    "        - Use `devm_request_irq()` or `devm_request_threaded_irq()` for IRQ handling",
+    "        - Handle all failure paths robustly with proper cleanup",
+    "        - Add meaningful `dev_info()` or `pr_info()` log messages for load/unload",
+    "        - Comply with kernel 6.x+ style and API standards to avoid implicit declarations or warnings",
+    "\n4. char_procfs.c (Scenario Tag: char_procfs)",
+    "    * A character device driver that exposes information or allows control via a procfs entry.",
+    "    * Required printk on load: \"char_procfs: procfs entry created\"",
+    "    * Required printk on unload: \"char_procfs: procfs entry removed\"",
+    "    * Important: Use the modern `proc_ops` structure for procfs operations.",
+    "\n5. hello_module.c (Scenario Tag: hello_module)",
+    "    * A very basic \"Hello World\" kernel module.",
+    "    * Required printk on load: \"hello_module: Hello World!\"",
+    "    * Required printk on unload: \"hello_module: Goodbye, World!\"",
+    "\n--- END AI PROMPT ---",
+    "\nStep 2: Once you have the AI's complete response, copy the ENTIRE response ",
+    f"and paste it into a single file named '{AI_OUTPUT_FILENAME}' in the following directory:",
+    f"  {DRIVERS_TO_EVALUATE_DIR}/",
+    "\nStep 3: Functional testing involves loading kernel modules. This requires 'sudo' privileges.",
+    f"A buggy module could potentially destabilize your VM's kernel. Proceed with caution.",
+    f"\nStep 4: Press Enter here to begin evaluation...",
+])
+
 # --- Logging Setup ---
 logging.basicConfig(
     level=logging.INFO,
@@ -55,6 +283,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Drivers are evaluated in parallel worker processes, but loading modules and
+# clearing dmesg touch the live kernel, so functional tests take this lock.
+# Set in each worker by init_evaluation_worker(); None when running serially.
+FUNCTIONAL_TEST_LOCK = None
+# Parallel jobs for each driver build (make -j). Workers get their share of the CPUs
+# from init_evaluation_worker() so concurrent builds do not oversubscribe the machine.
+MAKE_JOBS = os.cpu_count() or 1
+
+# Long-lived root shell used by run_privileged_command(), started on first use in each
+# process. It exits on its own when the process ends and its stdin pipe is closed.
+SUDO_SHELL = None
+SUDO_SHELL_COMMAND = ["sudo", "bash"]
+SUDO_SHELL_STDERR_SENTINEL = "__EVAL_SUDO_STDERR__"
+SUDO_SHELL_SENTINEL = "__EVAL_SUDO_DONE__"
+
 # --- Helper Functions ---
 
 def setup_evaluation_run_dirs():
@@ -70,68 +313,7 @@ def print_ai_prompt_instructions(current_run_dir):
     """
     Refined instructions to help the user generate better formatted AI output for easier parsing.
     """
-    print("\n" + "="*80)
-    print("                      Linux Device Driver AI Evaluation System")
-    print("="*80)
-    print("Step 1: Prompt your AI model with the following:")
-    print("\n--- AI PROMPT TO USE (Copy-Paste and Modify as needed) ---")
-    print("Generate exactly 5 distinct Linux kernel modules in C, each representing one scenario described below.")
-    print("Each module's code block should be explicitly delimited by comments of the format:")
-    print("    // START:<unique_scenario_tag>")
-    print("    // ... C code for the module ...")
-    print("    // END:<same_tag>")
-    print("Do NOT include file name comments or excessive text between modules. Ensure NO Markdown fences (` ```c `) are used.")
-    print("Adhere strictly to Linux kernel coding standards (e.g., 80-char line limit, tab indentation, specific brace style).")
-    print("Ensure robust error handling for all kernel API calls.")
-    print("Ensure all allocated resources are properly freed in error paths and the module exit function.")
-    print("Include necessary printk messages at KERN_INFO level for module load and unload events, precisely matching the specified strings below.")
-    print("List the modules in this exact order:")
-
-    # Detailed instructions for each scenario, matching SCENARIO_MAP order
-    print("\n1. char_rw.c (Scenario Tag: char_rw)")
-    print("    * A basic character device driver that supports read and write operations.")
-    print("    * Required printk on load: \"char_rw: device registered\"")
-    print("    * Required printk on unload: \"char_rw: device unregistered\"")
-
-    print("\n2. char_ioctl_sync.c (Scenario Tag: char_ioctl_sync)")
-    print("    * A character device driver that demonstrates `ioctl` with synchronous operations.")
-    print("    * Required printk on load: \"char_ioctl_sync: device registered\"")
-    print("    * Required printk on unload: \"char_ioctl_sync: device unregistered\"")
-
-    print("\n3. platform_gpio_irq.c (Scenario Tag: platform_gpio_irq)")
-    print("    * A platform device driver that interacts with GPIOs and handles interrupts (e.g., simple button press).")
-    print("    * Required printk on load: \"platform_gpio_irq: platform driver loaded\"")
-    print("    * Required printk on unload: \"platform_gpio_irq: platform driver unloaded\"")
-    print("    * CRITICAL GUIDELINES for successful compilation and execution:")
-    print("        - MUST use modern GPIO descriptor API: `devm_gpiod_get()` and `gpiod_to_irq()`")
-    print("        - DO NOT use deprecated functions like `of_get_named_gpio()` or legacy `gpio_*()` APIs")
-    print("        - Must support Device Tree via `of_match_table` and use `irq-gpios` phandle in DT")
-    print("        - Ensure `platform_probe()` returns `int`, and `platform_remove()` returns `int` or `void`")
-    print("        - Use `devm_request_irq()` or `devm_request_threaded_irq()` for IRQ handling")
-    print("        - Handle all failure paths robustly with proper cleanup")
-    print("        - Add meaningful `dev_info()` or `pr_info()` log messages for load/unload")
-    print("        - Comply with kernel 6.x+ style and API standards to avoid implicit declarations or warnings")
-
-
-    print("\n4. char_procfs.c (Scenario Tag: char_procfs)")
-    print("    * A character device driver that exposes information or allows control via a procfs entry.")
-    print("    * Required printk on load: \"char_procfs: procfs entry created\"")
-    print("    * Required printk on unload: \"char_procfs: procfs entry removed\"")
-    print("    * Important: Use the modern `proc_ops` structure for procfs operations.")
-
-    print("\n5. hello_module.c (Scenario Tag: hello_module)")
-    print("    * A very basic \"Hello World\" kernel module.")
-    print("    * Required printk on load: \"hello_module: Hello World!\"")
-    print("    * Required printk on unload: \"hello_module: Goodbye, World!\"")
-    
-    print("\n--- END AI PROMPT ---")
-    
-    print("\nStep 2: Once you have the AI's complete response, copy the ENTIRE response ")
-    print(f"and paste it into a single file named '{AI_OUTPUT_FILENAME}' in the following directory:")
-    print(f"  {DRIVERS_TO_EVALUATE_DIR}/")
-    print("\nStep 3: Functional testing involves loading kernel modules. This requires 'sudo' privileges.")
-    print(f"A buggy module could potentially destabilize your VM's kernel. Proceed with caution.")
-    print(f"\nStep 4: Press Enter here to begin evaluation...")
+    print(AI_PROMPT_INSTRUCTIONS)
     input("Waiting for your input... ")
 
 
@@ -148,60 +330,45 @@ def parse_ai_output_file(file_path):
         list: A list of dictionaries, where each dict is {'filename': str, 'code_content': str, 'category': str}.
     """
     drivers_data = []
-    current_tag = None
-    current_code_lines = []
-    
-    # Regex for START and END tags
-    start_tag_re = re.compile(r'^\s*//\s*START:([a-zA-Z0-9_\-]+)\s*$')
-    end_tag_re = re.compile(r'^\s*//\s*END:([a-zA-Z0-9_\-]+)\s*$')
 
     try:
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                block_matches = [] # mmap refuses empty files
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as ai_output:
+                    block_matches = []
+                    append_block = block_matches.append
+                    for m in DRIVER_BLOCK_RE.finditer(ai_output):
+                        # Slice the code straight out of the mapping by its offsets and
+                        # trim it before decoding.
+                        code_start, code_end = m.span(2)
+                        code_bytes = ai_output[code_start:code_end]
+                        if b'END:' in code_bytes:
+                            code_bytes = STRAY_END_LINE_RE.sub(b'', code_bytes)
+                        code_bytes = code_bytes.strip()
+                        if b'\r' in code_bytes:
+                            code_bytes = code_bytes.replace(b'\r\n', b'\n') # Match text-mode newline handling
+                        append_block((m.group(1).decode('ascii'), code_bytes.decode('utf-8', errors='replace')))
 
         scenario_index = 0
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            start_match = start_tag_re.match(line)
-            end_match = end_tag_re.match(line)
-
-            if start_match:
-                current_tag = start_match.group(1)
-                current_code_lines = []
-                logger.debug(f"Found START tag: {current_tag}")
-                i += 1 # Move past the START tag
-                continue
-            
-            if end_match:
-                matched_tag = end_match.group(1)
-                logger.debug(f"Found END tag: {matched_tag}")
-                if current_tag and current_tag == matched_tag:
-                    if scenario_index < len(SCENARIO_MAP):
-                        expected_scenario = SCENARIO_MAP[scenario_index]
-                        if current_tag == expected_scenario["tag"]:
-                            drivers_data.append({
-                                'filename': expected_scenario["filename"],
-                                'code_content': "".join(current_code_lines).strip(),
-                                'category': expected_scenario["category"]
-                            })
-                            logger.info(f"  Successfully parsed '{expected_scenario['filename']}' (Tag: {current_tag}).")
-                            scenario_index += 1
-                        else:
-                            logger.error(f"  Tag mismatch for scenario {scenario_index+1}. Expected '{expected_scenario['tag']}', but found '{current_tag}'. Skipping this block.")
-                    else:
-                        logger.warning(f"  Found more driver blocks than expected. Skipping extra block with tag '{current_tag}'.")
-                    current_tag = None
-                    current_code_lines = []
+        append_driver = drivers_data.append
+        for current_tag, code_content in block_matches:
+            logger.debug(f"Found START/END block: {current_tag}")
+            if scenario_index < len(SCENARIO_MAP):
+                expected_scenario = SCENARIO_MAP[scenario_index]
+                if current_tag == expected_scenario["tag"]:
+                    append_driver({
+                        'filename': expected_scenario["filename"],
+                        'code_content': code_content,
+                        'category': expected_scenario["category"]
+                    })
+                    logger.info(f"  Successfully parsed '{expected_scenario['filename']}' (Tag: {current_tag}).")
+                    scenario_index += 1
                 else:
-                    logger.warning(f"  Mismatched END tag '{matched_tag}' or no START tag found. Skipping block.")
-                i += 1 # Move past the END tag
-                continue
-            
-            if current_tag: # Only append if we are inside a defined block
-                current_code_lines.append(line)
-            
-            i += 1
+                    logger.error(f"  Tag mismatch for scenario {scenario_index+1}. Expected '{expected_scenario['tag']}', but found '{current_tag}'. Skipping this block.")
+            else:
+                logger.warning(f"  Found more driver blocks than expected. Skipping extra block with tag '{current_tag}'.")
 
     except FileNotFoundError:
         logger.error(f"Error: AI output file '{file_path}' not found.")
@@ -218,36 +385,44 @@ def parse_ai_output_file(file_path):
 
     return drivers_data
 
-def run_command(command, cwd, description, allow_failure=False):
+def run_command(command, cwd, description, allow_failure=False, capture=True):
     """
     Helper to run shell commands and capture output.
     Logs command details at DEBUG level for less console noise.
     `allow_failure` can be set to True if the command is expected to sometimes fail (e.g., rmmod if module not loaded).
+    `capture` can be set to False for commands whose output is never used (e.g., make clean);
+    their output is discarded and empty strings are returned for stdout and stderr.
     """
     logger.debug(f"  Running: {description} (CMD: {' '.join(command)}) in {cwd}")
+    output_target = subprocess.PIPE if capture else subprocess.DEVNULL
     try:
         result = subprocess.run(
             command,
             cwd=cwd,
-            capture_output=True,
+            stdout=output_target,
+            stderr=output_target,
             text=True,
             check=False # Always capture output and let caller decide to check return code
         )
-        if result.returncode != 0 and not allow_failure:
-            logger.debug(f"  {description} failed with exit code {result.returncode}")
-            if result.stdout:
-                logger.debug(f"  {description} STDOUT:\n{result.stdout.strip()}")
-            if result.stderr:
-                logger.debug(f"  {description} STDERR:\n{result.stderr.strip()}")
-        elif result.returncode != 0 and allow_failure:
-             logger.debug(f"  {description} failed as expected (return code {result.returncode}), STDOUT: {result.stdout.strip()}, STDERR: {result.stderr.strip()}")
-        else: # Command succeeded
-            if result.stdout:
-                logger.debug(f"  {description} STDOUT:\n{result.stdout.strip()}")
-            if result.stderr:
-                logger.debug(f"  {description} STDERR:\n{result.stderr.strip()}")
-
-        return result.returncode, result.stdout, result.stderr
+        stdout = result.stdout or ""
+        stderr = result.stderr or ""
+        # Skip stripping/formatting possibly large outputs unless DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            if result.returncode != 0 and not allow_failure:
+                logger.debug(f"  {description} failed with exit code {result.returncode}")
+                if stdout:
+                    logger.debug(f"  {description} STDOUT:\n{stdout.strip()}")
+                if stderr:
+                    logger.debug(f"  {description} STDERR:\n{stderr.strip()}")
+            elif result.returncode != 0 and allow_failure:
+                 logger.debug(f"  {description} failed as expected (return code {result.returncode}), STDOUT: {stdout.strip()}, STDERR: {stderr.strip()}")
+            else: # Command succeeded
+                if stdout:
+                    logger.debug(f"  {description} STDOUT:\n{stdout.strip()}")
+                if stderr:
+                    logger.debug(f"  {description} STDERR:\n{stderr.strip()}")
+
+        return result.returncode, stdout, stderr
     except FileNotFoundError:
         logger.error(f"  Error: Command not found for {description}. Is it installed and in PATH?")
         return -1, "", "Command not found."
@@ -256,7 +431,270 @@ def run_command(command, cwd, description, allow_failure=False):
         return -1, "", str(e)
 
 
+def start_sudo_shell():
+    """
+    Starts the root shell used for privileged commands, so sudo authenticates once
+    per process instead of once per insmod/rmmod/dmesg call.
+    """
+    global SUDO_SHELL
+    SUDO_SHELL = subprocess.Popen(
+        SUDO_SHELL_COMMAND,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1
+    )
+    # Root creates its own stderr scratch file (and removes it on exit): with
+    # fs.protected_regular, root may not reopen a user-owned file in sticky /tmp
+    SUDO_SHELL.stdin.write("eval_err=$(mktemp) && trap 'rm -f -- \"$eval_err\"' EXIT\n")
+    SUDO_SHELL.stdin.flush()
+
+
+def read_sudo_shell_output(sentinel):
+    """
+    Reads the root shell's output up to the next sentinel line.
+
+    Args:
+        sentinel (str): Marker the shell prints at the start of a line after the output.
+
+    Returns:
+        tuple: (output, rest of the sentinel line)
+    """
+    output_lines = []
+    for line in SUDO_SHELL.stdout:
+        if line.startswith(sentinel):
+            # Drop the newline printed ahead of the sentinel
+            return "".join(output_lines)[:-1], line[len(sentinel):]
+        output_lines.append(line)
+    raise RuntimeError("sudo shell exited unexpectedly")
+
+
+def run_privileged_command(command, cwd, description, allow_failure=False):
+    """
+    Runs a command as root through the persistent sudo shell.
+    Takes the same arguments and returns the same (returncode, stdout, stderr) tuple as run_command().
+    """
+    global SUDO_SHELL
+    logger.debug(f"  Running (root shell): {description} (CMD: {' '.join(command)}) in {cwd}")
+    try:
+        if SUDO_SHELL is None or SUDO_SHELL.poll() is not None:
+            start_sudo_shell()
+        # Each command runs in a subshell, so its cd does not leak into later (relative)
+        # cwds, and reads /dev/null so it cannot eat the shell's own input. The shell then echoes the command's stdout, a sentinel, its stderr, and a second
+        # sentinel followed by the exit code.
+        SUDO_SHELL.stdin.write(
+            f"( cd -- {shlex.quote(cwd)} && {shlex.join(command)} ) </dev/null 2>\"$eval_err\"; eval_rc=$?; "
+            f"printf '\\n{SUDO_SHELL_STDERR_SENTINEL}\\n'; cat -- \"$eval_err\"; "
+            f"printf '\\n{SUDO_SHELL_SENTINEL}%d\\n' $eval_rc\n"
+        )
+        SUDO_SHELL.stdin.flush()
+        stdout, _ = read_sudo_shell_output(SUDO_SHELL_STDERR_SENTINEL)
+        stderr, returncode_text = read_sudo_shell_output(SUDO_SHELL_SENTINEL)
+        returncode = int(returncode_text)
+    except (OSError, RuntimeError, ValueError) as e:
+        logger.error(f"  Root shell failed during {description}: {e}")
+        SUDO_SHELL = None
+        return -1, "", str(e)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        if returncode != 0 and allow_failure:
+            logger.debug(f"  {description} failed as expected (return code {returncode}), STDOUT: {stdout.strip()}, STDERR: {stderr.strip()}")
+        else:
+            if returncode != 0:
+                logger.debug(f"  {description} failed with exit code {returncode}")
+            if stdout:
+                logger.debug(f"  {description} STDOUT:\n{stdout.strip()}")
+            if stderr:
+                logger.debug(f"  {description} STDERR:\n{stderr.strip()}")
+    return returncode, stdout, stderr
+
+
+def count_matches(pattern, text):
+    """
+    Counts the matches of a compiled pattern without building a list of them.
+
+    Args:
+        pattern (re.Pattern): Compiled pattern to count.
+        text (str): Text to scan.
+
+    Returns:
+        int: Number of non-overlapping matches.
+    """
+    return sum(1 for _ in pattern.finditer(text))
+
+
+def is_compile_error_line(line):
+    """
+    Returns True for a compiler error line, skipping lines that also mention "warning:".
+    """
+    return "warning:" not in line.lower() and COMPILE_ERROR_LINE_RE.search(line) is not None
+
+
+def run_command_streaming(command, cwd, description, line_matchers, log_path=None, env=None):
+    """
+    Like run_command(), but reads the command's merged stdout/stderr line by line as it
+    is produced, counting matching lines on the fly and optionally writing them to a log file.
+    Used for the build and analysis tools, whose output can be large.
+
+    Args:
+        command (list): The command to run.
+        cwd (str): Working directory.
+        description (str): Short description for log messages.
+        line_matchers (dict): {name: callable}; counts lines for which matcher(line) is truthy
+            (typically a compiled pattern's .search).
+        log_path (str, optional): File to write the raw output to while it streams.
+        env (dict, optional): Environment for the command; inherits ours when None.
+
+    Returns:
+        tuple: (returncode, output, counts) where counts maps each matcher name to its line count.
+    """
+    logger.debug(f"  Running: {description} (CMD: {' '.join(command)}) in {cwd}")
+    counts = dict.fromkeys(line_matchers, 0)
+    output_lines = []
+    try:
+        with subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        ) as proc, open(log_path or os.devnull, "w") as log_f:
+            for line in proc.stdout:
+                output_lines.append(line)
+                log_f.write(line)
+                for name, matcher in line_matchers.items():
+                    if matcher(line):
+                        counts[name] += 1
+            returncode = proc.wait()
+    except FileNotFoundError:
+        logger.error(f"  Error: Command not found for {description}. Is it installed and in PATH?")
+        return -1, "", counts
+    except Exception as e:
+        logger.error(f"  An unexpected error occurred during {description}: {e}", exc_info=True)
+        return -1, "", counts
+
+    output = "".join(output_lines)
+    if logger.isEnabledFor(logging.DEBUG):
+        if returncode != 0:
+            logger.debug(f"  {description} failed with exit code {returncode}")
+        if output:
+            logger.debug(f"  {description} OUTPUT:\n{output.strip()}")
+    return returncode, output, counts
+
+
+def run_checkpatch_batch(driver_paths):
+    """
+    Runs checkpatch.pl over many driver sources using at most one perl process per CPU,
+    each linting a group of files, instead of paying perl start-up once per driver.
+    The groups run concurrently and each one's output is split back per file.
+
+    Args:
+        driver_paths (list): Paths to the driver .c files.
+
+    Returns:
+        dict: {driver_path: (stdout, stderr)} for every driver that was linted.
+    """
+    if not driver_paths:
+        return {}
+
+    # Run from the common parent so each file is reported under a short relative name
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in driver_paths])
+    rel_paths = {os.path.relpath(os.path.abspath(p), base_dir): p for p in driver_paths}
+    names = list(rel_paths)
+    group_count = min(len(names), os.cpu_count() or 1)
+    groups = [names[i::group_count] for i in range(group_count)]
+
+    logger.info(f"  Running checkpatch.pl on {len(names)} drivers in {group_count} batch(es)...")
+    processes = []
+    for group in groups:
+        try:
+            processes.append((group, subprocess.Popen(
+                [CHECKPATCH_SCRIPT, "--no-tree", "-f"] + group,
+                cwd=base_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )))
+        except OSError as e:
+            logger.error(f"  Could not start checkpatch.pl batch: {e}")
+
+    results = {}
+    for group, process in processes:
+        stdout, stderr = process.communicate()
+        if len(group) == 1:
+            results[rel_paths[group[0]]] = (stdout, stderr)
+            continue
+        # With several files checkpatch.pl prints a "----/<file>/----" banner before each report
+        banner_re = re.compile(r'^-+\n(' + '|'.join(map(re.escape, group)) + r')\n-+\n', re.MULTILINE)
+        parts = banner_re.split(stdout)
+        for name, report in zip(parts[1::2], parts[2::2]):
+            results[rel_paths[name]] = (report, stderr)
+    return results
+
+
+def is_module_loaded(module_name):
+    """
+    Checks /proc/modules for a loaded module, without spawning lsmod.
+
+    Args:
+        module_name (str): The name of the module (e.g., "hello_module").
+
+    Returns:
+        bool: True if the module is currently loaded.
+    """
+    prefix = f"{module_name} "
+    try:
+        with open("/proc/modules", "r") as f:
+            return any(line.startswith(prefix) for line in f)
+    except OSError:
+        return False
+
+
 def functional_test_driver(module_ko_path, module_name, output_dir, expected_load_msg=None, expected_unload_msg=None):
+    """
+    Runs run_functional_test() while holding FUNCTIONAL_TEST_LOCK (if set), so that
+    only one worker at a time loads modules and reads dmesg.
+    """
+    if FUNCTIONAL_TEST_LOCK is None:
+        return run_functional_test(module_ko_path, module_name, output_dir, expected_load_msg, expected_unload_msg)
+    with FUNCTIONAL_TEST_LOCK:
+        return run_functional_test(module_ko_path, module_name, output_dir, expected_load_msg, expected_unload_msg)
+
+
+def read_dmesg_since(mark, output_dir, description, keep_output=True):
+    """
+    Reads the kernel log without clearing it, so other users of the host keep their dmesg
+    history. The root shell filters it, returning only the records stamped after mark,
+    capped to their last DMESG_TAIL_BYTES bytes.
+
+    Args:
+        mark (str): Last timestamp already seen, as returned by a previous call; "-1" for none.
+        output_dir (str): Working directory for the privileged command.
+        description (str): Short description for log messages.
+        keep_output (bool): If False, only the new mark is fetched and no records are returned.
+
+    Returns:
+        tuple: (new_output, new_mark) where new_mark is the last timestamp in the log.
+    """
+    returncode, new_output, stderr = run_privileged_command(
+        ["sh", "-c", DMESG_SINCE_SCRIPT, "dmesg-since", mark, "1" if keep_output else "0", str(DMESG_TAIL_BYTES)],
+        cwd=output_dir, description=description
+    )
+    if returncode != 0:
+        logger.error(f"    Could not read dmesg ({description}): {stderr.strip()}")
+        return "", mark
+    if len(new_output) >= DMESG_TAIL_BYTES:
+        logger.warning(f"    dmesg output ({description}) was cut to its last {DMESG_TAIL_BYTES} bytes.")
+    # The mark is the last stderr line; dmesg's own errors, if any, come before it
+    new_mark = stderr.strip().rpartition("\n")[2]
+    return new_output, new_mark or mark
+
+
+def run_functional_test(module_ko_path, module_name, output_dir, expected_load_msg=None, expected_unload_msg=None):
     """
     Attempts to load and unload a kernel module and checks dmesg for messages and oopses.
 
@@ -268,15 +706,16 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
         expected_unload_msg (str, optional): Message expected in dmesg on unload.
 
     Returns:
-        dict: Test results including success, oops detection, and dmesg outputs.
+        dict: Test results including success, oops detection, and the names of the dmesg
+              log files in output_dir (the dmesg text itself is only kept on disk).
     """
     logger.info(f"    Starting functional test for {module_name}.ko")
     results = {
         "load_success": False,
         "unload_success": False,
         "kernel_oops_detected": False,
-        "load_dmesg": "",
-        "unload_dmesg": "",
+        "dmesg_output_load": "",
+        "dmesg_output_unload": "",
         "load_msg_found": False,
         "unload_msg_found": False,
         "test_passed": False
@@ -290,11 +729,10 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
         return results
 
     # --- Pre-check: Attempt to unload if already loaded ---
-    lsmod_return_code, lsmod_stdout, _ = run_command(["lsmod"], cwd=output_dir, description="lsmod")
-    if lsmod_return_code == 0 and module_name in lsmod_stdout:
+    if is_module_loaded(module_name):
         logger.warning(f"    Module {module_name} already loaded. Attempting to unload...")
-        rmmod_return_code, _, rmmod_stderr = run_command(
-            ["sudo", "rmmod", module_name], cwd=output_dir,
+        rmmod_return_code, _, rmmod_stderr = run_privileged_command(
+            ["rmmod", module_name], cwd=output_dir,
             description=f"Pre-emptive rmmod {module_name}", allow_failure=True
         )
         if rmmod_return_code != 0:
@@ -302,13 +740,13 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
         else:
             logger.info(f"    Pre-emptive rmmod successful.")
 
-    # Clear dmesg
-    run_command(["sudo", "dmesg", "-c"], cwd=output_dir, description="Clear dmesg")
+    # Remember where the kernel log ends instead of clearing it
+    _, dmesg_mark = read_dmesg_since("-1", output_dir, "dmesg before load", keep_output=False)
 
     # --- Load the module ---
     logger.info(f"    Attempting to load module: {module_name}.ko")
-    load_return_code, load_stdout, load_stderr = run_command(
-        ["sudo", "insmod", abs_module_ko_path],
+    load_return_code, load_stdout, load_stderr = run_privileged_command(
+        ["insmod", abs_module_ko_path],
         cwd=output_dir,
         description=f"insmod {module_name}.ko"
     )
@@ -318,61 +756,47 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
     if load_stderr:
         logger.error(f"    insmod stderr:\n{load_stderr.strip()}")
 
-    _, dmesg_after_load, _ = run_command(["sudo", "dmesg"], cwd=output_dir, description="dmesg after load")
-    results["load_dmesg"] = dmesg_after_load
-
-    failure_indicators = [
-        r'insmod: ERROR:',
-        r'No such file or directory',
-        r'Invalid module format',
-        r'unresolved symbol',
-        r'Unknown symbol',
-        r'kernel panic',
-        r'oops',
-        r'tainted'
-    ]
-    failure_detected = any(re.search(pattern, dmesg_after_load, re.IGNORECASE) for pattern in failure_indicators)
+    dmesg_after_load, dmesg_mark = read_dmesg_since(dmesg_mark, output_dir, "dmesg after load")
+
+    failure_detected = bool(LOAD_FAILURE_RE.search(dmesg_after_load))
 
     if load_return_code == 0 and not failure_detected:
         results["load_success"] = True
         logger.info(f"    Module {module_name}.ko loaded successfully.")
     else:
         logger.error(f"    Module {module_name}.ko failed to load properly.")
-        logger.debug(f"    Full dmesg after load:\n{dmesg_after_load}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"    Full dmesg after load:\n{dmesg_after_load}")
         if load_return_code != 0:
-            _, recent_dmesg, _ = run_command(["sudo", "dmesg", "-t"], cwd=output_dir, description="dmesg after failed load")
-            results["load_dmesg"] += "\n--- Recent dmesg after failed load ---\n" + recent_dmesg
-            logger.error(f"    Recent dmesg output:\n{recent_dmesg.strip()}")
+            logger.error(f"    Recent dmesg output:\n{dmesg_after_load.strip()}")
 
-    if re.search(r'kernel (panic|oops|bug):', dmesg_after_load, re.IGNORECASE):
+    if KERNEL_OOPS_RE.search(dmesg_after_load):
         results["kernel_oops_detected"] = True
         logger.error(f"    !!!!! KERNEL OOPS DETECTED AFTER LOADING {module_name}.ko !!!!!")
 
     if expected_load_msg:
-        if re.search(re.escape(expected_load_msg), dmesg_after_load, re.IGNORECASE):
+        if expected_load_msg.lower() in dmesg_after_load.lower():
             results["load_msg_found"] = True
             logger.info(f"    Expected load message found: '{expected_load_msg}'")
         else:
             logger.warning(f"    Expected load message NOT found: '{expected_load_msg}'")
             logger.debug(dmesg_after_load[-1000:])
 
-    with open(os.path.join(output_dir, f"{module_name}_dmesg_load.log"), "w") as f:
+    results["dmesg_output_load"] = f"{module_name}_dmesg_load.log"
+    with open(os.path.join(output_dir, results["dmesg_output_load"]), "w") as f:
         f.write(dmesg_after_load)
 
     # --- Unload ---
     if results["load_success"] and not results["kernel_oops_detected"]:
-        run_command(["sudo", "dmesg", "-c"], cwd=output_dir, description="Clear dmesg before unload")
-
         logger.info(f"    Attempting to unload module: {module_name}")
-        unload_return_code, _, unload_stderr = run_command(
-            ["sudo", "rmmod", module_name], cwd=output_dir, description=f"rmmod {module_name}"
+        unload_return_code, _, unload_stderr = run_privileged_command(
+            ["rmmod", module_name], cwd=output_dir, description=f"rmmod {module_name}"
         )
 
-        _, dmesg_after_unload, _ = run_command(["sudo", "dmesg"], cwd=output_dir, description="dmesg after unload")
-        results["unload_dmesg"] = dmesg_after_unload
+        dmesg_after_unload, _ = read_dmesg_since(dmesg_mark, output_dir, "dmesg after unload")
 
         if unload_return_code == 0:
-            if not re.search(r'rmmod: ERROR:|fail|error|Device or resource busy', dmesg_after_unload, re.IGNORECASE):
+            if not UNLOAD_PROBLEM_RE.search(dmesg_after_unload):
                 results["unload_success"] = True
                 logger.info(f"    Module {module_name} unloaded successfully.")
             else:
@@ -380,23 +804,24 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
         else:
             logger.error(f"    Failed to unload module {module_name}: {unload_stderr.strip()}")
 
-        if re.search(r'kernel (panic|oops|bug):', dmesg_after_unload, re.IGNORECASE):
+        if KERNEL_OOPS_RE.search(dmesg_after_unload):
             results["kernel_oops_detected"] = True
             logger.error(f"    !!!!! KERNEL OOPS DETECTED AFTER UNLOADING {module_name}.ko !!!!!")
 
         if expected_unload_msg:
-            if re.search(re.escape(expected_unload_msg), dmesg_after_unload, re.IGNORECASE):
+            if expected_unload_msg.lower() in dmesg_after_unload.lower():
                 results["unload_msg_found"] = True
                 logger.info(f"    Expected unload message found: '{expected_unload_msg}'")
             else:
                 logger.warning(f"    Expected unload message NOT found: '{expected_unload_msg}'")
                 logger.debug(dmesg_after_unload[-1000:])
 
-        with open(os.path.join(output_dir, f"{module_name}_dmesg_unload.log"), "w") as f:
+        results["dmesg_output_unload"] = f"{module_name}_dmesg_unload.log"
+        with open(os.path.join(output_dir, results["dmesg_output_unload"]), "w") as f:
             f.write(dmesg_after_unload)
     else:
         logger.warning("    Skipping unload due to load failure or detected oops.")
-        run_command(["sudo", "rmmod", module_name], cwd=output_dir, description=f"Final cleanup rmmod {module_name}", allow_failure=True)
+        run_privileged_command(["rmmod", module_name], cwd=output_dir, description=f"Final cleanup rmmod {module_name}", allow_failure=True)
 
     results["test_passed"] = (
         results["load_success"]
@@ -410,9 +835,9 @@ def functional_test_driver(module_ko_path, module_name, output_dir, expected_loa
     return results
 
 
-def evaluate_char_rw_driver(driver_path, output_dir, category):
+def evaluate_driver(driver_path, output_dir, category, checkpatch_result=None):
     """
-    Evaluates a char_device_basic_rw driver.
+    Evaluates a driver of any category listed in EXPECTED_MODULE_MESSAGES.
     Handles compilation, style checks, static analysis, and functional tests.
     """
     driver_filename = os.path.basename(driver_path)
@@ -434,52 +859,70 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
     }
     logger.info(f"\n--- Evaluating Driver: {driver_filename} (Category: {category}) ---")
 
-    # Corrected expected messages for char_rw driver to match AI prompt and functional test
-    expected_load_msg = f"{driver_name_stem}: device registered"
-    expected_unload_msg = f"{driver_name_stem}: device unregistered"
+    # Expected messages for this category, matching the AI prompt
+    load_msg_suffix, unload_msg_suffix = EXPECTED_MODULE_MESSAGES[category]
+    expected_load_msg = f"{driver_name_stem}: {load_msg_suffix}"
+    expected_unload_msg = f"{driver_name_stem}: {unload_msg_suffix}"
 
 
     # --- Step 6.1: Compilation Assessment ---
     logger.info(f"  [STEP 6.1] Compiling {driver_filename}...")
     
-    run_command(["make", "clean"], cwd=output_dir, description="make clean")
+    run_command(["make", "clean"], cwd=output_dir, description="make clean", capture=False)
     
-    bear_return_code, bear_stdout, bear_stderr = run_command(["bear", "--", "make"], cwd=output_dir, description="Bear (make)")
-    compilation_output = bear_stdout + bear_stderr
+    make_command = ["make", f"-j{MAKE_JOBS}"]
+    make_env = None
+    if CCACHE_MASQUERADE_DIR:
+        make_env = dict(os.environ)
+        make_env["PATH"] = CCACHE_MASQUERADE_DIR + os.pathsep + make_env.get("PATH", os.defpath)
+        make_env.setdefault("CCACHE_DIR", CCACHE_DIR)
+
+    compile_matchers = {"errors": is_compile_error_line, "warnings": COMPILE_WARNING_LINE_RE.search}
+    make_log_path = os.path.join(output_dir, TOOL_OUTPUT_LOGS["compilation"])
+    bear_return_code, compilation_output, compile_counts = run_command_streaming(
+        ["bear", "--"] + make_command, cwd=output_dir, description="Bear (make)",
+        line_matchers=compile_matchers, log_path=make_log_path, env=make_env
+    )
     
     if bear_return_code == -1:
         logger.warning("  'bear' command not found. Falling back to 'make' without compilation database.")
-        make_return_code, make_stdout, make_stderr = run_command(["make"], cwd=output_dir, description="make fallback")
-        compilation_output = make_stdout + make_stderr
+        make_return_code, compilation_output, compile_counts = run_command_streaming(
+            make_command, cwd=output_dir, description="make fallback",
+            line_matchers=compile_matchers, log_path=make_log_path, env=make_env
+        )
         final_make_return_code = make_return_code
     else:
         final_make_return_code = bear_return_code
 
-    compile_errors = len(re.findall(r'^(?!.*warning:.*$).*:\s*(error|fatal error):.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-    compile_warnings = len(re.findall(r'^\s*.*:\d+:\d+:\s*warning:.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
+    compile_errors = compile_counts["errors"]
+    compile_warnings = compile_counts["warnings"]
 
     metrics["compilation"]["errors_count"] = compile_errors
     metrics["compilation"]["warnings_count"] = compile_warnings
     metrics["compilation"]["output"] = compilation_output.strip()
 
-    logger.info(f"  Expected .ko path: {module_ko_path}")
-    logger.info(f"  Checking if .ko file exists after compilation command: {os.path.exists(module_ko_path)}")
     try:
-        logger.info(f"  Files in output_dir after make: {os.listdir(output_dir)}")
+        output_dir_entries = os.listdir(output_dir)
     except OSError as e:
         logger.error(f"  Could not list directory {output_dir}: {e}")
+        output_dir_entries = []
+    ko_exists = f"{driver_name_stem}.ko" in output_dir_entries
+    logger.info(f"  Expected .ko path: {module_ko_path}")
+    logger.info(f"  Checking if .ko file exists after compilation command: {ko_exists}")
+    logger.debug(f"  Files in output_dir after make: {output_dir_entries}")
 
     if final_make_return_code == 0 and compile_errors == 0:
-        if os.path.exists(module_ko_path):
+        if ko_exists:
             metrics["compilation"]["success"] = True
             logger.info("  Compilation successful (no errors detected, .ko generated).")
         else:
             logger.error("  Compilation reported success (exit 0, no errors in output), but .ko file is missing!")
-            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {os.listdir(output_dir)}")
+            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {output_dir_entries}")
             metrics["compilation"]["success"] = False
     else:
         logger.error(f"  Compilation failed: Make exit code {final_make_return_code}, Errors in output {compile_errors}.")
-        logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
 
 
     # --- Step 6.2: Code Style Compliance (checkpatch.pl) ---
@@ -488,16 +931,21 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
     style_warnings = 0
     style_errors = 0
 
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK): # Check if executable
-        checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
-        checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
-            checkpatch_command, cwd=output_dir, description="checkpatch.pl"
-        )
+    if CHECKPATCH_AVAILABLE:
+        if checkpatch_result is not None: # Already linted by run_checkpatch_batch()
+            checkpatch_stdout, checkpatch_stderr = checkpatch_result
+        else:
+            checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
+            checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
+                checkpatch_command, cwd=output_dir, description="checkpatch.pl"
+            )
 
-        style_warnings = len(re.findall(r'WARNING:', checkpatch_stdout))
-        style_errors = len(re.findall(r'ERROR:', checkpatch_stdout))
+        style_warnings = checkpatch_stdout.count("WARNING:")
+        style_errors = checkpatch_stdout.count("ERROR:")
         logger.info(f"  Checkpatch found {style_errors} errors and {style_warnings} warnings.")
         metrics["style"]["output"] = (checkpatch_stdout + checkpatch_stderr).strip()
+        with open(os.path.join(output_dir, TOOL_OUTPUT_LOGS["style"]), "w") as f:
+            f.write(metrics["style"]["output"])
     else:
         logger.error(f"  Error: checkpatch.pl not found or not executable at '{CHECKPATCH_SCRIPT}'. Is it installed and in PATH? You might need to 'chmod +x {CHECKPATCH_SCRIPT}' if it exists.")
         logger.error("  Skipping checkpatch: Script not found or executable.")
@@ -511,19 +959,34 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
     clang_tidy_issues = 0
     clang_tidy_output = ""
 
-    if os.path.exists(os.path.join(output_dir, "compile_commands.json")):
+    if compile_errors > CLANG_TIDY_MAX_COMPILE_ERRORS:
+        # The source is too broken for clang-tidy to say more than the compiler already did
+        logger.warning(f"  Skipping clang-tidy: {compile_errors} compilation errors (limit {CLANG_TIDY_MAX_COMPILE_ERRORS}).")
+        clang_tidy_output = f"Skipped: {compile_errors} compilation errors."
+    elif "compile_commands.json" in output_dir_entries: # Written by bear during Step 6.1
         clang_tidy_command = [
             "clang-tidy",
             "-p", ".",
-            f"--checks='linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*'",
+            # No shell is involved, so the check list must not carry its own quotes
+            "--checks=linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*",
             "-system-headers=false",
+            "-quiet", # Drop the "N warnings generated" / "Suppressed ..." chatter
             driver_filename
         ]
-        clang_tidy_return_code, clang_tidy_stdout, clang_tidy_stderr = run_command(
-            clang_tidy_command, cwd=output_dir, description="clang-tidy"
+        clang_tidy_env = None
+        if CLANG_TIDY_CACHE:
+            # ctcache replays the saved diagnostics for an unchanged driver instead of re-running clang-tidy
+            clang_tidy_command.insert(0, CLANG_TIDY_CACHE)
+            clang_tidy_env = dict(os.environ)
+            clang_tidy_env.setdefault("CTCACHE_DIR", CLANG_TIDY_CACHE_DIR)
+            clang_tidy_env["CTCACHE_SAVE_OUTPUT"] = "1" # Issue counts come from the output, so hits must replay it
+        clang_tidy_return_code, clang_tidy_output, clang_tidy_counts = run_command_streaming(
+            clang_tidy_command, cwd=output_dir, description="clang-tidy",
+            line_matchers={"issues": CLANG_TIDY_ISSUE_LINE_RE.search},
+            log_path=os.path.join(output_dir, TOOL_OUTPUT_LOGS["static_analysis"]),
+            env=clang_tidy_env
         )
-        clang_tidy_output = clang_tidy_stdout + clang_tidy_stderr
-        clang_tidy_issues = len(re.findall(r'^\s*\S+:\d+:\d+:\s*(warning|error):', clang_tidy_output, re.MULTILINE | re.IGNORECASE))
+        clang_tidy_issues = clang_tidy_counts["issues"]
         logger.info(f"  Clang-tidy found {clang_tidy_issues} issues.")
     else:
         logger.warning("  'compile_commands.json' not found. Skipping clang-tidy. Ensure 'bear' is installed and 'make' succeeds.")
@@ -536,7 +999,7 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
     logger.info(f"  [STEP 6.4] Running functional tests on {driver_filename}...")
     metrics["functionality"]["test_attempted"] = True
 
-    if metrics["compilation"]["success"] and os.path.exists(module_ko_path):
+    if metrics["compilation"]["success"] and ko_exists:
         functional_results = functional_test_driver(
             module_ko_path,
             driver_name_stem,
@@ -547,7 +1010,7 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
         metrics["functionality"].update(functional_results)
     else:
         logger.warning("  Skipping functional testing: Module did not compile successfully or .ko file missing.")
-        if not os.path.exists(module_ko_path):
+        if not ko_exists:
             logger.warning("  Score penalty: Functional test skipped because .ko file was not truly available for `insmod`.")
             metrics["functionality"]["load_success"] = False
         else:
@@ -555,82 +1018,52 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
 
 
     # --- Step 6.5: Calculate Detailed and Overall Scores ---
-    detailed_metrics = {
-        "correctness": {
-            "weight": 0.4,
-            "compilation_success": 0.0,
-            "functionality_pass": 0.0,
-            "kernel_api_usage": 1.0 
-        },
-        "security_safety": {
-            "weight": 0.25,
-            "memory_safety": 1.0, 
-            "resource_management": 1.0, 
-            "race_conditions": 1.0, 
-            "input_validation": 1.0 
-        },
-        "code_quality": {
-            "weight": 0.2,
-            "style_compliance": 1.0, 
-            "error_handling": 1.0, 
-            "documentation": 0.7, 
-            "maintainability": 0.8 
-        },
-        "performance": {
-            "weight": 0.1,
-            "efficiency": 0.75, 
-            "scalability": 0.6, 
-            "memory_usage": 0.75 
-        },
-        "advanced_features": {
-            "weight": 0.05,
-            "power_management": 0.5, 
-            "device_tree_support": 0.4, 
-            "debug_support": 0.9 
-        }
-    }
+    # Fresh per-driver copy; every sub-score is a float, so copying each category dict is enough
+    detailed_metrics = {name: dict(scores) for name, scores in DEFAULT_DETAILED_METRICS.items()}
+
+    static_analysis_lower = metrics["static_analysis"]["output"].lower()
 
     # --- Populate Correctness Scores ---
     detailed_metrics["correctness"]["compilation_success"] = 1.0 if metrics["compilation"]["success"] else 0.0
     detailed_metrics["correctness"]["functionality_pass"] = 1.0 if metrics["functionality"]["test_passed"] else 0.0
 
     api_misuse_penalty = 0
-    api_misuse_issues = len(re.findall(r'linuxkernel-.*:', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
+    api_misuse_issues = count_matches(API_MISUSE_RE, static_analysis_lower)
     api_misuse_penalty += api_misuse_issues * 0.05 
     detailed_metrics["correctness"]["kernel_api_usage"] = max(0.0, 1.0 - api_misuse_penalty)
 
     # --- Populate Security & Safety Scores ---
     mem_safety_penalty = 0
-    mem_safety_issues = len(re.findall(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureAPI\.memcpy|memory leak', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
+    mem_safety_issues = count_matches(MEMORY_SAFETY_RE, static_analysis_lower)
     mem_safety_penalty += mem_safety_issues * 0.05
     detailed_metrics["security_safety"]["memory_safety"] = max(0.0, 1.0 - mem_safety_penalty)
 
     resource_mgmt_penalty = 0
-    resource_mgmt_issues = len(re.findall(r'resource leak|unhandled return value', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
+    resource_mgmt_issues = count_matches(RESOURCE_MGMT_RE, static_analysis_lower)
     resource_mgmt_penalty += resource_mgmt_issues * 0.05
     detailed_metrics["security_safety"]["resource_management"] = max(0.0, 1.0 - resource_mgmt_penalty)
 
     race_cond_penalty = 0
-    race_cond_issues = len(re.findall(r'concurrency-.*|race condition', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
+    race_cond_issues = count_matches(RACE_CONDITION_RE, static_analysis_lower) 
     race_cond_penalty += race_cond_issues * 0.05
     detailed_metrics["security_safety"]["race_conditions"] = max(0.0, 1.0 - race_cond_penalty)
 
     input_val_penalty = 0
-    input_val_issues = len(re.findall(r'clang-analyzer-security.insecureAPI|buffer-overflow|bounds check', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
+    input_val_issues = count_matches(INPUT_VALIDATION_RE, static_analysis_lower)
     input_val_penalty += input_val_issues * 0.05
     detailed_metrics["security_safety"]["input_validation"] = max(0.0, 1.0 - input_val_penalty)
 
 
     # --- Populate Code Quality Scores ---
     style_compliance_score = 1.0
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK):
+    if CHECKPATCH_AVAILABLE:
         style_compliance_score -= (metrics["style"]["errors_count"] * 0.01) # Example penalty
         style_compliance_score -= (metrics["style"]["warnings_count"] * 0.005) # Example penalty
     detailed_metrics["code_quality"]["style_compliance"] = max(0.0, style_compliance_score)
 
     error_handling_score = 1.0
     error_handling_score -= (metrics["compilation"]["warnings_count"] * 0.005)
-    error_handling_issues = len(re.findall(r'error handling|return value ignored', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
+    error_handling_issues = count_matches(ERROR_HANDLING_RE, static_analysis_lower) 
     error_handling_score -= error_handling_issues * 0.02
     detailed_metrics["code_quality"]["error_handling"] = max(0.0, error_handling_score)
 
@@ -639,23 +1072,9 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
 
     # --- Calculate Overall Score based on new weighted metrics ---
     overall_score_sum = 0
-    for category_name, category_data in detailed_metrics.items():
-        if category_name in ["overall_score"]: 
-            continue 
-
-        weight = category_data.get("weight", 0)
-        category_sub_score_sum = 0
-        sub_criteria_count = 0
-        
-        for key, value in category_data.items():
-            if key != "weight": 
-                category_sub_score_sum += value
-                sub_criteria_count += 1
-        
-        if sub_criteria_count > 0:
-            overall_score_sum += (category_sub_score_sum / sub_criteria_count) * weight
-        else:
-            logger.warning(f"Category '{category_name}' has no sub-criteria for scoring. Check detailed_metrics definition.")
+    for category_name, weight, sub_criteria in SCORE_SCHEMA:
+        category_data = detailed_metrics[category_name]
+        overall_score_sum += (sum(category_data[key] for key in sub_criteria) / len(sub_criteria)) * weight
 
     final_calculated_score = overall_score_sum * 100
     detailed_metrics["overall_score"] = round(final_calculated_score, 2)
@@ -666,1077 +1085,142 @@ def evaluate_char_rw_driver(driver_path, output_dir, category):
     logger.info(f"  Overall Score for {driver_filename}: {metrics['overall_score']}/100")
 
     report_path_json = os.path.join(output_dir, "report.json")
-    with open(report_path_json, "w") as f:
-        json.dump(metrics, f, indent=4)
+    write_json_report(metrics_for_report(metrics), report_path_json)
     logger.info(f"  Individual report saved to {report_path_json}")
 
     return metrics
 
 
+def truncate_tool_output(text, log_name):
+    """
+    Shortens a tool's output for the JSON reports, keeping its head and tail.
 
+    Args:
+        text (str): The full tool output.
+        log_name (str): Log file in the driver's directory that holds the full output.
 
-def evaluate_char_ioctl_sync_driver(driver_path, output_dir, category):
-    """
-    Evaluates a char_device_ioctl driver.
-    Handles compilation, style checks, static analysis, and functional tests.
+    Returns:
+        str: The text unchanged if it is short enough, otherwise its first and last
+             TOOL_OUTPUT_REPORT_CHARS characters around a truncation marker.
     """
-    driver_filename = os.path.basename(driver_path)
-    driver_name_stem = os.path.splitext(driver_filename)[0]
-    module_ko_path = os.path.join(output_dir, f"{driver_name_stem}.ko")
+    if len(text) <= 2 * TOOL_OUTPUT_REPORT_CHARS:
+        return text
+    return (
+        f"{text[:TOOL_OUTPUT_REPORT_CHARS]}\n"
+        f"... [truncated, full output in {log_name}] ...\n"
+        f"{text[-TOOL_OUTPUT_REPORT_CHARS:]}"
+    )
 
-    metrics = {
-        "filename": driver_filename,
-        "category": category,
-        "compilation": {"success": False, "errors_count": 0, "warnings_count": 0, "output": ""},
-        "style": {"warnings_count": 0, "errors_count": 0, "output": ""},
-        "static_analysis": {"issues_count": 0, "output": ""},
-        "functionality": {
-            "test_attempted": False, "load_success": False, "unload_success": False,
-            "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
-            "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""
-        },
-        "overall_score": 0
-    }
-    logger.info(f"\n--- Evaluating Driver: {driver_filename} (Category: {category}) ---")
 
-    # Expected messages for char_ioctl_sync driver
-    expected_load_msg = f"{driver_name_stem}: device registered"
-    expected_unload_msg = f"{driver_name_stem}: device unregistered"
+def metrics_for_report(metrics):
+    """
+    Returns a copy of a driver's metrics with the raw tool outputs truncated for JSON.
+    The in-memory metrics keep the full text, which the fine-tuning suggestions scan.
+    """
+    report = dict(metrics)
+    for section, log_name in TOOL_OUTPUT_LOGS.items():
+        report[section] = dict(metrics[section], output=truncate_tool_output(metrics[section]["output"], log_name))
+    return report
 
 
-    # --- Step 6.1: Compilation Assessment ---
-    logger.info(f"  [STEP 6.1] Compiling {driver_filename}...")
-    
-    run_command(["make", "clean"], cwd=output_dir, description="make clean")
-    
-    bear_return_code, bear_stdout, bear_stderr = run_command(["bear", "--", "make"], cwd=output_dir, description="Bear (make)")
-    compilation_output = bear_stdout + bear_stderr
-    
-    if bear_return_code == -1:
-        logger.warning("  'bear' command not found. Falling back to 'make' without compilation database.")
-        make_return_code, make_stdout, make_stderr = run_command(["make"], cwd=output_dir, description="make fallback")
-        compilation_output = make_stdout + make_stderr
-        final_make_return_code = make_return_code
-    else:
-        final_make_return_code = bear_return_code
+def write_json_report(data, path):
+    """
+    Writes a report as 2-space indented UTF-8 JSON in a single write, using orjson when it
+    is installed. The json fallback is configured to produce the same text.
 
-    compile_errors = len(re.findall(r'^(?!.*warning:.*$).*:\s*(error|fatal error):.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-    compile_warnings = len(re.findall(r'^\s*.*:\d+:\d+:\s*warning:.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
+    Args:
+        data (dict): The report to serialize.
+        path (str): Destination file.
+    """
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, indent=2, ensure_ascii=False))
 
-    metrics["compilation"]["errors_count"] = compile_errors
-    metrics["compilation"]["warnings_count"] = compile_warnings
-    metrics["compilation"]["output"] = compilation_output.strip()
 
-    logger.info(f"  Expected .ko path: {module_ko_path}")
-    logger.info(f"  Checking if .ko file exists after compilation command: {os.path.exists(module_ko_path)}")
-    try:
-        logger.info(f"  Files in output_dir after make: {os.listdir(output_dir)}")
-    except OSError as e:
-        logger.error(f"  Could not list directory {output_dir}: {e}")
+def init_evaluation_worker(functional_test_lock, make_jobs):
+    """
+    ProcessPoolExecutor initializer: shares the functional test lock with a worker process
+    and sets how many make jobs its driver builds may use.
+    """
+    global FUNCTIONAL_TEST_LOCK, MAKE_JOBS
+    FUNCTIONAL_TEST_LOCK = functional_test_lock
+    MAKE_JOBS = make_jobs
 
-    if final_make_return_code == 0 and compile_errors == 0:
-        if os.path.exists(module_ko_path):
-            metrics["compilation"]["success"] = True
-            logger.info("  Compilation successful (no errors detected, .ko generated).")
-        else:
-            logger.error("  Compilation reported success (exit 0, no errors in output), but .ko file is missing!")
-            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {os.listdir(output_dir)}")
-            metrics["compilation"]["success"] = False
-    else:
-        logger.error(f"  Compilation failed: Make exit code {final_make_return_code}, Errors in output {compile_errors}.")
-        logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
 
+def prepare_driver_dir(driver_info, results_dir, makefile_template):
+    """
+    Writes one parsed driver and its Makefile into its own evaluation directory.
 
-    # --- Step 6.2: Code Style Compliance (checkpatch.pl) ---
-    logger.info(f"  [STEP 6.2] Running checkpatch.pl on {driver_filename}...")
-    
-    style_warnings = 0
-    style_errors = 0
+    Args:
+        driver_info (dict): One entry returned by parse_ai_output_file().
+        results_dir (str): The run's "results" directory, already created by the caller.
+        makefile_template (str): Contents of TEMPLATE_MAKEFILE, read once by the caller.
 
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK): # Check if executable
-        checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
-        checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
-            checkpatch_command, cwd=output_dir, description="checkpatch.pl"
-        )
+    Returns:
+        tuple: (driver_target_path, file_eval_dir)
+    """
+    driver_filename = driver_info['filename']
+    driver_code_content = driver_info['code_content']
+    driver_stem = os.path.splitext(driver_filename)[0]
 
-        style_warnings = len(re.findall(r'WARNING:', checkpatch_stdout))
-        style_errors = len(re.findall(r'ERROR:', checkpatch_stdout))
-        logger.info(f"  Checkpatch found {style_errors} errors and {style_warnings} warnings.")
-        metrics["style"]["output"] = (checkpatch_stdout + checkpatch_stderr).strip()
-    else:
-        logger.error(f"  Error: checkpatch.pl not found or not executable at '{CHECKPATCH_SCRIPT}'. Is it installed and in PATH? You might need to 'chmod +x {CHECKPATCH_SCRIPT}' if it exists.")
-        logger.error("  Skipping checkpatch: Script not found or executable.")
+    file_eval_dir = os.path.join(results_dir, driver_stem)
+    try:
+        os.mkdir(file_eval_dir) # Parent exists, so skip makedirs' per-component checks
+    except FileExistsError:
+        pass
     
-    metrics["style"]["warnings_count"] = style_warnings
-    metrics["style"]["errors_count"] = style_errors
+    driver_target_path = os.path.join(file_eval_dir, driver_filename)
+    Path(driver_target_path).write_bytes(driver_code_content.encode('utf-8'))
+    logger.info(f"  Copied '{driver_filename}' to its evaluation directory.")
 
+    makefile_target_path = os.path.join(file_eval_dir, "Makefile")
+    try:
+        makefile_content = makefile_template.replace("$(DRIVER_NAME)", driver_stem)
+        Path(makefile_target_path).write_bytes(makefile_content.encode('utf-8'))
+        logger.info(f"  Created Makefile for '{driver_filename}'.")
+    except Exception as e:
+        logger.error(f"Error creating Makefile for '{driver_filename}': {e}", exc_info=True)
+        exit(1)
 
-    # --- Step 6.3: Deep Static Analysis (clang-tidy) ---
-    logger.info(f"  [STEP 6.3] Running clang-tidy on {driver_filename}...")
-    clang_tidy_issues = 0
-    clang_tidy_output = ""
+    return driver_target_path, file_eval_dir
 
-    if os.path.exists(os.path.join(output_dir, "compile_commands.json")):
-        clang_tidy_command = [
-            "clang-tidy",
-            "-p", ".",
-            f"--checks='linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*'",
-            "-system-headers=false",
-            driver_filename
-        ]
-        clang_tidy_return_code, clang_tidy_stdout, clang_tidy_stderr = run_command(
-            clang_tidy_command, cwd=output_dir, description="clang-tidy"
-        )
-        clang_tidy_output = clang_tidy_stdout + clang_tidy_stderr
-        clang_tidy_issues = len(re.findall(r'^\s*\S+:\d+:\d+:\s*(warning|error):', clang_tidy_output, re.MULTILINE | re.IGNORECASE))
-        logger.info(f"  Clang-tidy found {clang_tidy_issues} issues.")
-    else:
-        logger.warning("  'compile_commands.json' not found. Skipping clang-tidy. Ensure 'bear' is installed and 'make' succeeds.")
-    
-    metrics["static_analysis"]["issues_count"] = clang_tidy_issues
-    metrics["static_analysis"]["output"] = clang_tidy_output.strip()
 
+def evaluate_parsed_driver(driver_info, driver_target_path, file_eval_dir, checkpatch_result=None):
+    """
+    Runs the evaluation function for a prepared driver's category.
+    Runs in a worker process, so it only touches that driver's directory.
 
-    # --- Step 6.4: Functional Testing ---
-    logger.info(f"  [STEP 6.4] Running functional tests on {driver_filename}...")
-    metrics["functionality"]["test_attempted"] = True
+    Args:
+        driver_info (dict): One entry returned by parse_ai_output_file().
+        driver_target_path (str): The driver source written by prepare_driver_dir().
+        file_eval_dir (str): The driver's evaluation directory.
+        checkpatch_result (tuple, optional): (stdout, stderr) from run_checkpatch_batch().
 
-    if metrics["compilation"]["success"] and os.path.exists(module_ko_path):
-        functional_results = functional_test_driver(
-            module_ko_path,
-            driver_name_stem,
-            output_dir,
-            expected_load_msg,
-            expected_unload_msg
-        )
-        metrics["functionality"].update(functional_results)
-    else:
-        logger.warning("  Skipping functional testing: Module did not compile successfully or .ko file missing.")
-        if not os.path.exists(module_ko_path):
-            logger.warning("  Score penalty: Functional test skipped because .ko file was not truly available for `insmod`.")
-            metrics["functionality"]["load_success"] = False
-        else:
-            logger.warning("  Score penalty: Functional test not attempted (due to compilation issues).")
+    Returns:
+        dict: The driver's evaluation metrics.
+    """
+    driver_filename = driver_info['filename']
+    final_category = driver_info['category']
 
+    logger.info(f"Automatically detected '{driver_filename}' as: {final_category}")
 
-    # --- Step 6.5: Calculate Detailed and Overall Scores ---
-    detailed_metrics = {
-        "correctness": {
-            "weight": 0.4,
-            "compilation_success": 0.0,
-            "functionality_pass": 0.0,
-            "kernel_api_usage": 1.0 
-        },
-        "security_safety": {
-            "weight": 0.25,
-            "memory_safety": 1.0, 
-            "resource_management": 1.0, 
-            "race_conditions": 1.0, 
-            "input_validation": 1.0 
-        },
-        "code_quality": {
-            "weight": 0.2,
-            "style_compliance": 1.0, 
-            "error_handling": 1.0, 
-            "documentation": 0.7, 
-            "maintainability": 0.8 
-        },
-        "performance": {
-            "weight": 0.1,
-            "efficiency": 0.75, 
-            "scalability": 0.6, 
-            "memory_usage": 0.75 
-        },
-        "advanced_features": {
-            "weight": 0.05,
-            "power_management": 0.5, 
-            "device_tree_support": 0.4, 
-            "debug_support": 0.9 
-        }
-    }
-
-    # --- Populate Correctness Scores ---
-    detailed_metrics["correctness"]["compilation_success"] = 1.0 if metrics["compilation"]["success"] else 0.0
-    detailed_metrics["correctness"]["functionality_pass"] = 1.0 if metrics["functionality"]["test_passed"] else 0.0
-
-    api_misuse_penalty = 0
-    api_misuse_issues = len(re.findall(r'linuxkernel-.*:', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    api_misuse_penalty += api_misuse_issues * 0.05 
-    detailed_metrics["correctness"]["kernel_api_usage"] = max(0.0, 1.0 - api_misuse_penalty)
-
-    # --- Populate Security & Safety Scores ---
-    mem_safety_penalty = 0
-    mem_safety_issues = len(re.findall(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureAPI\.memcpy|memory leak', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    mem_safety_penalty += mem_safety_issues * 0.05
-    detailed_metrics["security_safety"]["memory_safety"] = max(0.0, 1.0 - mem_safety_penalty)
-
-    resource_mgmt_penalty = 0
-    resource_mgmt_issues = len(re.findall(r'resource leak|unhandled return value', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    resource_mgmt_penalty += resource_mgmt_issues * 0.05
-    detailed_metrics["security_safety"]["resource_management"] = max(0.0, 1.0 - resource_mgmt_penalty)
-
-    race_cond_penalty = 0
-    race_cond_issues = len(re.findall(r'concurrency-.*|race condition', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    race_cond_penalty += race_cond_issues * 0.05
-    detailed_metrics["security_safety"]["race_conditions"] = max(0.0, 1.0 - race_cond_penalty)
-
-    input_val_penalty = 0
-    input_val_issues = len(re.findall(r'clang-analyzer-security.insecureAPI|buffer-overflow|bounds check', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    input_val_penalty += input_val_issues * 0.05
-    detailed_metrics["security_safety"]["input_validation"] = max(0.0, 1.0 - input_val_penalty)
-
-
-    # --- Populate Code Quality Scores ---
-    style_compliance_score = 1.0
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK):
-        style_compliance_score -= (metrics["style"]["errors_count"] * 0.01) # Example penalty
-        style_compliance_score -= (metrics["style"]["warnings_count"] * 0.005) # Example penalty
-    detailed_metrics["code_quality"]["style_compliance"] = max(0.0, style_compliance_score)
-
-    error_handling_score = 1.0
-    error_handling_score -= (metrics["compilation"]["warnings_count"] * 0.005)
-    error_handling_issues = len(re.findall(r'error handling|return value ignored', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    error_handling_score -= error_handling_issues * 0.02
-    detailed_metrics["code_quality"]["error_handling"] = max(0.0, error_handling_score)
-
-    # Documentation and Maintainability are largely subjective/require more advanced tools. Keeping defaults.
-
-
-    # --- Calculate Overall Score based on new weighted metrics ---
-    overall_score_sum = 0
-    for category_name, category_data in detailed_metrics.items():
-        if category_name in ["overall_score"]: 
-            continue 
-
-        weight = category_data.get("weight", 0)
-        category_sub_score_sum = 0
-        sub_criteria_count = 0
-        
-        for key, value in category_data.items():
-            if key != "weight": 
-                category_sub_score_sum += value
-                sub_criteria_count += 1
-        
-        if sub_criteria_count > 0:
-            overall_score_sum += (category_sub_score_sum / sub_criteria_count) * weight
-        else:
-            logger.warning(f"Category '{category_name}' has no sub-criteria for scoring. Check detailed_metrics definition.")
-
-    final_calculated_score = overall_score_sum * 100
-    detailed_metrics["overall_score"] = round(final_calculated_score, 2)
-
-    metrics["detailed_scores"] = detailed_metrics
-    metrics["overall_score"] = detailed_metrics["overall_score"]
-
-    logger.info(f"  Overall Score for {driver_filename}: {metrics['overall_score']}/100")
-
-    report_path_json = os.path.join(output_dir, "report.json")
-    with open(report_path_json, "w") as f:
-        json.dump(metrics, f, indent=4)
-    logger.info(f"  Individual report saved to {report_path_json}")
-
-    return metrics
-   
-
-
-
-
-def evaluate_platform_gpio_irq_driver(driver_path, output_dir, category):
-    """
-    Evaluates a platform_driver_gpio_irq driver.
-    Handles compilation, style checks, static analysis, and functional tests.
-    """
-    driver_filename = os.path.basename(driver_path)
-    driver_name_stem = os.path.splitext(driver_filename)[0]
-    module_ko_path = os.path.join(output_dir, f"{driver_name_stem}.ko")
-
-    metrics = {
-        "filename": driver_filename,
-        "category": category,
-        "compilation": {"success": False, "errors_count": 0, "warnings_count": 0, "output": ""},
-        "style": {"warnings_count": 0, "errors_count": 0, "output": ""},
-        "static_analysis": {"issues_count": 0, "output": ""},
-        "functionality": {
-            "test_attempted": False, "load_success": False, "unload_success": False,
-            "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
-            "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""
-        },
-        "overall_score": 0
-    }
-    logger.info(f"\n--- Evaluating Driver: {driver_filename} (Category: {category}) ---")
-
-    # Expected messages for platform_gpio_irq driver
-    # The AI should be prompted to use these specific messages.
-    expected_load_msg = f"{driver_name_stem}: platform driver loaded"
-    expected_unload_msg = f"{driver_name_stem}: platform driver unloaded"
-
-
-    # --- Step 6.1: Compilation Assessment ---
-    logger.info(f"  [STEP 6.1] Compiling {driver_filename}...")
-    
-    run_command(["make", "clean"], cwd=output_dir, description="make clean")
-    
-    bear_return_code, bear_stdout, bear_stderr = run_command(["bear", "--", "make"], cwd=output_dir, description="Bear (make)")
-    compilation_output = bear_stdout + bear_stderr
-    
-    if bear_return_code == -1:
-        logger.warning("  'bear' command not found. Falling back to 'make' without compilation database.")
-        make_return_code, make_stdout, make_stderr = run_command(["make"], cwd=output_dir, description="make fallback")
-        compilation_output = make_stdout + make_stderr
-        final_make_return_code = make_return_code
-    else:
-        final_make_return_code = bear_return_code
-
-    compile_errors = len(re.findall(r'^(?!.*warning:.*$).*:\s*(error|fatal error):.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-    compile_warnings = len(re.findall(r'^\s*.*:\d+:\d+:\s*warning:.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-
-    metrics["compilation"]["errors_count"] = compile_errors
-    metrics["compilation"]["warnings_count"] = compile_warnings
-    metrics["compilation"]["output"] = compilation_output.strip()
-
-    logger.info(f"  Expected .ko path: {module_ko_path}")
-    logger.info(f"  Checking if .ko file exists after compilation command: {os.path.exists(module_ko_path)}")
-    try:
-        logger.info(f"  Files in output_dir after make: {os.listdir(output_dir)}")
-    except OSError as e:
-        logger.error(f"  Could not list directory {output_dir}: {e}")
-
-    if final_make_return_code == 0 and compile_errors == 0:
-        if os.path.exists(module_ko_path):
-            metrics["compilation"]["success"] = True
-            logger.info("  Compilation successful (no errors detected, .ko generated).")
-        else:
-            logger.error("  Compilation reported success (exit 0, no errors in output), but .ko file is missing!")
-            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {os.listdir(output_dir)}")
-            metrics["compilation"]["success"] = False
-    else:
-        logger.error(f"  Compilation failed: Make exit code {final_make_return_code}, Errors in output {compile_errors}.")
-        logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
-
-
-    # --- Step 6.2: Code Style Compliance (checkpatch.pl) ---
-    logger.info(f"  [STEP 6.2] Running checkpatch.pl on {driver_filename}...")
-    
-    style_warnings = 0
-    style_errors = 0
-
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK): # Check if executable
-        checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
-        checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
-            checkpatch_command, cwd=output_dir, description="checkpatch.pl"
-        )
-
-        style_warnings = len(re.findall(r'WARNING:', checkpatch_stdout))
-        style_errors = len(re.findall(r'ERROR:', checkpatch_stdout))
-        logger.info(f"  Checkpatch found {style_errors} errors and {style_warnings} warnings.")
-        metrics["style"]["output"] = (checkpatch_stdout + checkpatch_stderr).strip()
-    else:
-        logger.error(f"  Error: checkpatch.pl not found or not executable at '{CHECKPATCH_SCRIPT}'. Is it installed and in PATH? You might need to 'chmod +x {CHECKPATCH_SCRIPT}' if it exists.")
-        logger.error("  Skipping checkpatch: Script not found or executable.")
-    
-    metrics["style"]["warnings_count"] = style_warnings
-    metrics["style"]["errors_count"] = style_errors
-
-
-    # --- Step 6.3: Deep Static Analysis (clang-tidy) ---
-    logger.info(f"  [STEP 6.3] Running clang-tidy on {driver_filename}...")
-    clang_tidy_issues = 0
-    clang_tidy_output = ""
-
-    if os.path.exists(os.path.join(output_dir, "compile_commands.json")):
-        clang_tidy_command = [
-            "clang-tidy",
-            "-p", ".",
-            f"--checks='linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*'",
-            "-system-headers=false",
-            driver_filename
-        ]
-        clang_tidy_return_code, clang_tidy_stdout, clang_tidy_stderr = run_command(
-            clang_tidy_command, cwd=output_dir, description="clang-tidy"
-        )
-        clang_tidy_output = clang_tidy_stdout + clang_tidy_stderr
-        clang_tidy_issues = len(re.findall(r'^\s*\S+:\d+:\d+:\s*(warning|error):', clang_tidy_output, re.MULTILINE | re.IGNORECASE))
-        logger.info(f"  Clang-tidy found {clang_tidy_issues} issues.")
-    else:
-        logger.warning("  'compile_commands.json' not found. Skipping clang-tidy. Ensure 'bear' is installed and 'make' succeeds.")
-    
-    metrics["static_analysis"]["issues_count"] = clang_tidy_issues
-    metrics["static_analysis"]["output"] = clang_tidy_output.strip()
-
-
-    # --- Step 6.4: Functional Testing ---
-    logger.info(f"  [STEP 6.4] Running functional tests on {driver_filename}...")
-    metrics["functionality"]["test_attempted"] = True
-
-    if metrics["compilation"]["success"] and os.path.exists(module_ko_path):
-        functional_results = functional_test_driver(
-            module_ko_path,
-            driver_name_stem,
-            output_dir,
-            expected_load_msg,
-            expected_unload_msg
-        )
-        metrics["functionality"].update(functional_results)
-    else:
-        logger.warning("  Skipping functional testing: Module did not compile successfully or .ko file missing.")
-        if not os.path.exists(module_ko_path):
-            logger.warning("  Score penalty: Functional test skipped because .ko file was not truly available for `insmod`.")
-            metrics["functionality"]["load_success"] = False
-        else:
-            logger.warning("  Score penalty: Functional test not attempted (due to compilation issues).")
-
-
-    # --- Step 6.5: Calculate Detailed and Overall Scores ---
-    detailed_metrics = {
-        "correctness": {
-            "weight": 0.4,
-            "compilation_success": 0.0,
-            "functionality_pass": 0.0,
-            "kernel_api_usage": 1.0 
-        },
-        "security_safety": {
-            "weight": 0.25,
-            "memory_safety": 1.0, 
-            "resource_management": 1.0, 
-            "race_conditions": 1.0, 
-            "input_validation": 1.0 
-        },
-        "code_quality": {
-            "weight": 0.2,
-            "style_compliance": 1.0, 
-            "error_handling": 1.0, 
-            "documentation": 0.7, 
-            "maintainability": 0.8 
-        },
-        "performance": {
-            "weight": 0.1,
-            "efficiency": 0.75, 
-            "scalability": 0.6, 
-            "memory_usage": 0.75 
-        },
-        "advanced_features": {
-            "weight": 0.05,
-            "power_management": 0.5, 
-            "device_tree_support": 0.4, 
-            "debug_support": 0.9 
-        }
-    }
-
-    # --- Populate Correctness Scores ---
-    detailed_metrics["correctness"]["compilation_success"] = 1.0 if metrics["compilation"]["success"] else 0.0
-    detailed_metrics["correctness"]["functionality_pass"] = 1.0 if metrics["functionality"]["test_passed"] else 0.0
-
-    api_misuse_penalty = 0
-    api_misuse_issues = len(re.findall(r'linuxkernel-.*:', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    api_misuse_penalty += api_misuse_issues * 0.05 
-    detailed_metrics["correctness"]["kernel_api_usage"] = max(0.0, 1.0 - api_misuse_penalty)
-
-    # --- Populate Security & Safety Scores ---
-    mem_safety_penalty = 0
-    mem_safety_issues = len(re.findall(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureAPI\.memcpy|memory leak', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    mem_safety_penalty += mem_safety_issues * 0.05
-    detailed_metrics["security_safety"]["memory_safety"] = max(0.0, 1.0 - mem_safety_penalty)
-
-    resource_mgmt_penalty = 0
-    resource_mgmt_issues = len(re.findall(r'resource leak|unhandled return value', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    resource_mgmt_penalty += resource_mgmt_issues * 0.05
-    detailed_metrics["security_safety"]["resource_management"] = max(0.0, 1.0 - resource_mgmt_penalty)
-
-    race_cond_penalty = 0
-    race_cond_issues = len(re.findall(r'concurrency-.*|race condition', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    race_cond_penalty += race_cond_issues * 0.05
-    detailed_metrics["security_safety"]["race_conditions"] = max(0.0, 1.0 - race_cond_penalty)
-
-    input_val_penalty = 0
-    input_val_issues = len(re.findall(r'clang-analyzer-security.insecureAPI|buffer-overflow|bounds check', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    input_val_penalty += input_val_issues * 0.05
-    detailed_metrics["security_safety"]["input_validation"] = max(0.0, 1.0 - input_val_penalty)
-
-
-    # --- Populate Code Quality Scores ---
-    style_compliance_score = 1.0
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK):
-        style_compliance_score -= (metrics["style"]["errors_count"] * 0.01) 
-        style_compliance_score -= (metrics["style"]["warnings_count"] * 0.005) 
-    detailed_metrics["code_quality"]["style_compliance"] = max(0.0, style_compliance_score)
-
-    error_handling_score = 1.0
-    error_handling_score -= (metrics["compilation"]["warnings_count"] * 0.005)
-    error_handling_issues = len(re.findall(r'error handling|return value ignored', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    error_handling_score -= error_handling_issues * 0.02
-    detailed_metrics["code_quality"]["error_handling"] = max(0.0, error_handling_score)
-
-    # Documentation and Maintainability are largely subjective/require more advanced tools. Keeping defaults.
-
-
-    # --- Calculate Overall Score based on new weighted metrics ---
-    overall_score_sum = 0
-    for category_name, category_data in detailed_metrics.items():
-        if category_name in ["overall_score"]: 
-            continue 
-
-        weight = category_data.get("weight", 0)
-        category_sub_score_sum = 0
-        sub_criteria_count = 0
-        
-        for key, value in category_data.items():
-            if key != "weight": 
-                category_sub_score_sum += value
-                sub_criteria_count += 1
-        
-        if sub_criteria_count > 0:
-            overall_score_sum += (category_sub_score_sum / sub_criteria_count) * weight
-        else:
-            logger.warning(f"Category '{category_name}' has no sub-criteria for scoring. Check detailed_metrics definition.")
-
-    final_calculated_score = overall_score_sum * 100
-    detailed_metrics["overall_score"] = round(final_calculated_score, 2)
-
-    metrics["detailed_scores"] = detailed_metrics
-    metrics["overall_score"] = detailed_metrics["overall_score"]
-
-    logger.info(f"  Overall Score for {driver_filename}: {metrics['overall_score']}/100")
-
-    report_path_json = os.path.join(output_dir, "report.json")
-    with open(report_path_json, "w") as f:
-        json.dump(metrics, f, indent=4)
-    logger.info(f"  Individual report saved to {report_path_json}")
-
-    return metrics
-    
-
-
-def evaluate_char_procfs_driver(driver_path, output_dir, category):
-    """
-    Evaluates a char_device_procfs driver.
-    Handles compilation, style checks, static analysis, and functional tests.
-    """
-    driver_filename = os.path.basename(driver_path)
-    driver_name_stem = os.path.splitext(driver_filename)[0]
-    module_ko_path = os.path.join(output_dir, f"{driver_name_stem}.ko")
-
-    metrics = {
-        "filename": driver_filename,
-        "category": category,
-        "compilation": {"success": False, "errors_count": 0, "warnings_count": 0, "output": ""},
-        "style": {"warnings_count": 0, "errors_count": 0, "output": ""},
-        "static_analysis": {"issues_count": 0, "output": ""},
-        "functionality": {
-            "test_attempted": False, "load_success": False, "unload_success": False,
-            "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
-            "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""
-        },
-        "overall_score": 0
-    }
-    logger.info(f"\n--- Evaluating Driver: {driver_filename} (Category: {category}) ---")
-
-    # Expected messages for char_procfs driver
-    # The AI should be prompted to use these specific messages.
-    expected_load_msg = f"{driver_name_stem}: procfs entry created"
-    expected_unload_msg = f"{driver_name_stem}: procfs entry removed"
-
-
-    # --- Step 6.1: Compilation Assessment ---
-    logger.info(f"  [STEP 6.1] Compiling {driver_filename}...")
-    
-    run_command(["make", "clean"], cwd=output_dir, description="make clean")
-    
-    bear_return_code, bear_stdout, bear_stderr = run_command(["bear", "--", "make"], cwd=output_dir, description="Bear (make)")
-    compilation_output = bear_stdout + bear_stderr
-    
-    if bear_return_code == -1:
-        logger.warning("  'bear' command not found. Falling back to 'make' without compilation database.")
-        make_return_code, make_stdout, make_stderr = run_command(["make"], cwd=output_dir, description="make fallback")
-        compilation_output = make_stdout + make_stderr
-        final_make_return_code = make_return_code
-    else:
-        final_make_return_code = bear_return_code
-
-    compile_errors = len(re.findall(r'^(?!.*warning:.*$).*:\s*(error|fatal error):.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-    compile_warnings = len(re.findall(r'^\s*.*:\d+:\d+:\s*warning:.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-
-    metrics["compilation"]["errors_count"] = compile_errors
-    metrics["compilation"]["warnings_count"] = compile_warnings
-    metrics["compilation"]["output"] = compilation_output.strip()
-
-    logger.info(f"  Expected .ko path: {module_ko_path}")
-    logger.info(f"  Checking if .ko file exists after compilation command: {os.path.exists(module_ko_path)}")
-    try:
-        logger.info(f"  Files in output_dir after make: {os.listdir(output_dir)}")
-    except OSError as e:
-        logger.error(f"  Could not list directory {output_dir}: {e}")
-
-    if final_make_return_code == 0 and compile_errors == 0:
-        if os.path.exists(module_ko_path):
-            metrics["compilation"]["success"] = True
-            logger.info("  Compilation successful (no errors detected, .ko generated).")
-        else:
-            logger.error("  Compilation reported success (exit 0, no errors in output), but .ko file is missing!")
-            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {os.listdir(output_dir)}")
-            metrics["compilation"]["success"] = False
-    else:
-        logger.error(f"  Compilation failed: Make exit code {final_make_return_code}, Errors in output {compile_errors}.")
-        logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
-
-
-    # --- Step 6.2: Code Style Compliance (checkpatch.pl) ---
-    logger.info(f"  [STEP 6.2] Running checkpatch.pl on {driver_filename}...")
-    
-    style_warnings = 0
-    style_errors = 0
-
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK): # Check if executable
-        checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
-        checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
-            checkpatch_command, cwd=output_dir, description="checkpatch.pl"
-        )
-
-        style_warnings = len(re.findall(r'WARNING:', checkpatch_stdout))
-        style_errors = len(re.findall(r'ERROR:', checkpatch_stdout))
-        logger.info(f"  Checkpatch found {style_errors} errors and {style_warnings} warnings.")
-        metrics["style"]["output"] = (checkpatch_stdout + checkpatch_stderr).strip()
-    else:
-        logger.error(f"  Error: checkpatch.pl not found or not executable at '{CHECKPATCH_SCRIPT}'. Is it installed and in PATH? You might need to 'chmod +x {CHECKPATCH_SCRIPT}' if it exists.")
-        logger.error("  Skipping checkpatch: Script not found or executable.")
-    
-    metrics["style"]["warnings_count"] = style_warnings
-    metrics["style"]["errors_count"] = style_errors
-
-
-    # --- Step 6.3: Deep Static Analysis (clang-tidy) ---
-    logger.info(f"  [STEP 6.3] Running clang-tidy on {driver_filename}...")
-    clang_tidy_issues = 0
-    clang_tidy_output = ""
-
-    if os.path.exists(os.path.join(output_dir, "compile_commands.json")):
-        clang_tidy_command = [
-            "clang-tidy",
-            "-p", ".",
-            f"--checks='linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*'",
-            "-system-headers=false",
-            driver_filename
-        ]
-        clang_tidy_return_code, clang_tidy_stdout, clang_tidy_stderr = run_command(
-            clang_tidy_command, cwd=output_dir, description="clang-tidy"
-        )
-        clang_tidy_output = clang_tidy_stdout + clang_tidy_stderr
-        clang_tidy_issues = len(re.findall(r'^\s*\S+:\d+:\d+:\s*(warning|error):', clang_tidy_output, re.MULTILINE | re.IGNORECASE))
-        logger.info(f"  Clang-tidy found {clang_tidy_issues} issues.")
-    else:
-        logger.warning("  'compile_commands.json' not found. Skipping clang-tidy. Ensure 'bear' is installed and 'make' succeeds.")
-    
-    metrics["static_analysis"]["issues_count"] = clang_tidy_issues
-    metrics["static_analysis"]["output"] = clang_tidy_output.strip()
-
-
-    # --- Step 6.4: Functional Testing ---
-    logger.info(f"  [STEP 6.4] Running functional tests on {driver_filename}...")
-    metrics["functionality"]["test_attempted"] = True
-
-    if metrics["compilation"]["success"] and os.path.exists(module_ko_path):
-        functional_results = functional_test_driver(
-            module_ko_path,
-            driver_name_stem,
-            output_dir,
-            expected_load_msg,
-            expected_unload_msg
-        )
-        metrics["functionality"].update(functional_results)
-    else:
-        logger.warning("  Skipping functional testing: Module did not compile successfully or .ko file missing.")
-        if not os.path.exists(module_ko_path):
-            logger.warning("  Score penalty: Functional test skipped because .ko file was not truly available for `insmod`.")
-            metrics["functionality"]["load_success"] = False
-        else:
-            logger.warning("  Score penalty: Functional test not attempted (due to compilation issues).")
-
-
-    # --- Step 6.5: Calculate Detailed and Overall Scores ---
-    detailed_metrics = {
-        "correctness": {
-            "weight": 0.4,
-            "compilation_success": 0.0,
-            "functionality_pass": 0.0,
-            "kernel_api_usage": 1.0 
-        },
-        "security_safety": {
-            "weight": 0.25,
-            "memory_safety": 1.0, 
-            "resource_management": 1.0, 
-            "race_conditions": 1.0, 
-            "input_validation": 1.0 
-        },
-        "code_quality": {
-            "weight": 0.2,
-            "style_compliance": 1.0, 
-            "error_handling": 1.0, 
-            "documentation": 0.7, 
-            "maintainability": 0.8 
-        },
-        "performance": {
-            "weight": 0.1,
-            "efficiency": 0.75, 
-            "scalability": 0.6, 
-            "memory_usage": 0.75 
-        },
-        "advanced_features": {
-            "weight": 0.05,
-            "power_management": 0.5, 
-            "device_tree_support": 0.4, 
-            "debug_support": 0.9 
-        }
-    }
-
-    # --- Populate Correctness Scores ---
-    detailed_metrics["correctness"]["compilation_success"] = 1.0 if metrics["compilation"]["success"] else 0.0
-    detailed_metrics["correctness"]["functionality_pass"] = 1.0 if metrics["functionality"]["test_passed"] else 0.0
-
-    api_misuse_penalty = 0
-    api_misuse_issues = len(re.findall(r'linuxkernel-.*:', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    api_misuse_penalty += api_misuse_issues * 0.05 
-    detailed_metrics["correctness"]["kernel_api_usage"] = max(0.0, 1.0 - api_misuse_penalty)
-
-    # --- Populate Security & Safety Scores ---
-    mem_safety_penalty = 0
-    mem_safety_issues = len(re.findall(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureAPI\.memcpy|memory leak', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    mem_safety_penalty += mem_safety_issues * 0.05
-    detailed_metrics["security_safety"]["memory_safety"] = max(0.0, 1.0 - mem_safety_penalty)
-
-    resource_mgmt_penalty = 0
-    resource_mgmt_issues = len(re.findall(r'resource leak|unhandled return value', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    resource_mgmt_penalty += resource_mgmt_issues * 0.05
-    detailed_metrics["security_safety"]["resource_management"] = max(0.0, 1.0 - resource_mgmt_penalty)
-
-    race_cond_penalty = 0
-    race_cond_issues = len(re.findall(r'concurrency-.*|race condition', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    race_cond_penalty += race_cond_issues * 0.05
-    detailed_metrics["security_safety"]["race_conditions"] = max(0.0, 1.0 - race_cond_penalty)
-
-    input_val_penalty = 0
-    input_val_issues = len(re.findall(r'clang-analyzer-security.insecureAPI|buffer-overflow|bounds check', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    input_val_penalty += input_val_issues * 0.05
-    detailed_metrics["security_safety"]["input_validation"] = max(0.0, 1.0 - input_val_penalty)
-
-
-    # --- Populate Code Quality Scores ---
-    style_compliance_score = 1.0
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK):
-        style_compliance_score -= (metrics["style"]["errors_count"] * 0.01) 
-        style_compliance_score -= (metrics["style"]["warnings_count"] * 0.005) 
-    detailed_metrics["code_quality"]["style_compliance"] = max(0.0, style_compliance_score)
-
-    error_handling_score = 1.0
-    error_handling_score -= (metrics["compilation"]["warnings_count"] * 0.005)
-    error_handling_issues = len(re.findall(r'error handling|return value ignored', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    error_handling_score -= error_handling_issues * 0.02
-    detailed_metrics["code_quality"]["error_handling"] = max(0.0, error_handling_score)
-
-    # Documentation and Maintainability are largely subjective/require more advanced tools. Keeping defaults.
-
-
-    # --- Calculate Overall Score based on new weighted metrics ---
-    overall_score_sum = 0
-    for category_name, category_data in detailed_metrics.items():
-        if category_name in ["overall_score"]: 
-            continue 
-
-        weight = category_data.get("weight", 0)
-        category_sub_score_sum = 0
-        sub_criteria_count = 0
-        
-        for key, value in category_data.items():
-            if key != "weight": 
-                category_sub_score_sum += value
-                sub_criteria_count += 1
-        
-        if sub_criteria_count > 0:
-            overall_score_sum += (category_sub_score_sum / sub_criteria_count) * weight
-        else:
-            logger.warning(f"Category '{category_name}' has no sub-criteria for scoring. Check detailed_metrics definition.")
-
-    final_calculated_score = overall_score_sum * 100
-    detailed_metrics["overall_score"] = round(final_calculated_score, 2)
-
-    metrics["detailed_scores"] = detailed_metrics
-    metrics["overall_score"] = detailed_metrics["overall_score"]
-
-    logger.info(f"  Overall Score for {driver_filename}: {metrics['overall_score']}/100")
-
-    report_path_json = os.path.join(output_dir, "report.json")
-    with open(report_path_json, "w") as f:
-        json.dump(metrics, f, indent=4)
-    logger.info(f"  Individual report saved to {report_path_json}")
-
-    return metrics
-
+    if final_category in EXPECTED_MODULE_MESSAGES:
+        return evaluate_driver(driver_target_path, file_eval_dir, final_category, checkpatch_result)
 
-
-
-
-def evaluate_hello_module_driver(driver_path, output_dir, category):
-    """
-    Evaluates a basic_kernel_module driver (like a "hello world" module).
-    Handles compilation, style checks, static analysis, and functional tests.
-    """
-    driver_filename = os.path.basename(driver_path)
-    driver_name_stem = os.path.splitext(driver_filename)[0]
-    module_ko_path = os.path.join(output_dir, f"{driver_name_stem}.ko")
-
-    metrics = {
-        "filename": driver_filename,
-        "category": category,
-        "compilation": {"success": False, "errors_count": 0, "warnings_count": 0, "output": ""},
+    logger.error(f"No evaluation function defined for category: {final_category}. Skipping {driver_filename}.")
+    return {
+        "filename": driver_filename, "category": final_category,
+        "compilation": {"success": False, "errors_count": 99, "warnings_count": 0, "output": "No evaluation function."},
         "style": {"warnings_count": 0, "errors_count": 0, "output": ""},
         "static_analysis": {"issues_count": 0, "output": ""},
-        "functionality": {
-            "test_attempted": False, "load_success": False, "unload_success": False,
-            "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
-            "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""
-        },
+        "functionality": {"test_attempted": False, "load_success": False, "unload_success": False,
+                          "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
+                          "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""},
         "overall_score": 0
     }
-    logger.info(f"\n--- Evaluating Driver: {driver_filename} (Category: {category}) ---")
-
-    # Expected messages for a basic "hello world" module
-    # Ensure the AI generates these exact messages for successful detection.
-    expected_load_msg = f"{driver_name_stem}: Hello World!"
-    expected_unload_msg = f"{driver_name_stem}: Goodbye, World!"
-
-
-    # --- Step 6.1: Compilation Assessment ---
-    logger.info(f"  [STEP 6.1] Compiling {driver_filename}...")
-    
-    run_command(["make", "clean"], cwd=output_dir, description="make clean")
-    
-    bear_return_code, bear_stdout, bear_stderr = run_command(["bear", "--", "make"], cwd=output_dir, description="Bear (make)")
-    compilation_output = bear_stdout + bear_stderr
-    
-    if bear_return_code == -1:
-        logger.warning("  'bear' command not found. Falling back to 'make' without compilation database.")
-        make_return_code, make_stdout, make_stderr = run_command(["make"], cwd=output_dir, description="make fallback")
-        compilation_output = make_stdout + make_stderr
-        final_make_return_code = make_return_code
-    else:
-        final_make_return_code = bear_return_code
-
-    compile_errors = len(re.findall(r'^(?!.*warning:.*$).*:\s*(error|fatal error):.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-    compile_warnings = len(re.findall(r'^\s*.*:\d+:\d+:\s*warning:.*$', compilation_output, re.MULTILINE | re.IGNORECASE))
-
-    metrics["compilation"]["errors_count"] = compile_errors
-    metrics["compilation"]["warnings_count"] = compile_warnings
-    metrics["compilation"]["output"] = compilation_output.strip()
-
-    logger.info(f"  Expected .ko path: {module_ko_path}")
-    logger.info(f"  Checking if .ko file exists after compilation command: {os.path.exists(module_ko_path)}")
-    try:
-        logger.info(f"  Files in output_dir after make: {os.listdir(output_dir)}")
-    except OSError as e:
-        logger.error(f"  Could not list directory {output_dir}: {e}")
-
-    if final_make_return_code == 0 and compile_errors == 0:
-        if os.path.exists(module_ko_path):
-            metrics["compilation"]["success"] = True
-            logger.info("  Compilation successful (no errors detected, .ko generated).")
-        else:
-            logger.error("  Compilation reported success (exit 0, no errors in output), but .ko file is missing!")
-            logger.error(f"  Expected .ko at: {module_ko_path}. Directory contents: {os.listdir(output_dir)}")
-            metrics["compilation"]["success"] = False
-    else:
-        logger.error(f"  Compilation failed: Make exit code {final_make_return_code}, Errors in output {compile_errors}.")
-        logger.debug(f"  Full Compilation Output:\n{compilation_output.strip()}")
-
-
-    # --- Step 6.2: Code Style Compliance (checkpatch.pl) ---
-    logger.info(f"  [STEP 6.2] Running checkpatch.pl on {driver_filename}...")
-    
-    style_warnings = 0
-    style_errors = 0
-
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK): # Check if executable
-        checkpatch_command = [CHECKPATCH_SCRIPT, "--no-tree", "-f", driver_filename]
-        checkpatch_return_code, checkpatch_stdout, checkpatch_stderr = run_command(
-            checkpatch_command, cwd=output_dir, description="checkpatch.pl"
-        )
-
-        style_warnings = len(re.findall(r'WARNING:', checkpatch_stdout))
-        style_errors = len(re.findall(r'ERROR:', checkpatch_stdout))
-        logger.info(f"  Checkpatch found {style_errors} errors and {style_warnings} warnings.")
-        metrics["style"]["output"] = (checkpatch_stdout + checkpatch_stderr).strip()
-    else:
-        logger.error(f"  Error: checkpatch.pl not found or not executable at '{CHECKPATCH_SCRIPT}'. Is it installed and in PATH? You might need to 'chmod +x {CHECKPATCH_SCRIPT}' if it exists.")
-        logger.error("  Skipping checkpatch: Script not found or executable.")
-    
-    metrics["style"]["warnings_count"] = style_warnings
-    metrics["style"]["errors_count"] = style_errors
-
-
-    # --- Step 6.3: Deep Static Analysis (clang-tidy) ---
-    logger.info(f"  [STEP 6.3] Running clang-tidy on {driver_filename}...")
-    clang_tidy_issues = 0
-    clang_tidy_output = ""
-
-    if os.path.exists(os.path.join(output_dir, "compile_commands.json")):
-        clang_tidy_command = [
-            "clang-tidy",
-            "-p", ".",
-            f"--checks='linuxkernel-*,bugprone-*,misc-*,readability-*,performance-*'",
-            "-system-headers=false",
-            driver_filename
-        ]
-        clang_tidy_return_code, clang_tidy_stdout, clang_tidy_stderr = run_command(
-            clang_tidy_command, cwd=output_dir, description="clang-tidy"
-        )
-        clang_tidy_output = clang_tidy_stdout + clang_tidy_stderr
-        clang_tidy_issues = len(re.findall(r'^\s*\S+:\d+:\d+:\s*(warning|error):', clang_tidy_output, re.MULTILINE | re.IGNORECASE))
-        logger.info(f"  Clang-tidy found {clang_tidy_issues} issues.")
-    else:
-        logger.warning("  'compile_commands.json' not found. Skipping clang-tidy. Ensure 'bear' is installed and 'make' succeeds.")
-    
-    metrics["static_analysis"]["issues_count"] = clang_tidy_issues
-    metrics["static_analysis"]["output"] = clang_tidy_output.strip()
-
-
-    # --- Step 6.4: Functional Testing ---
-    logger.info(f"  [STEP 6.4] Running functional tests on {driver_filename}...")
-    metrics["functionality"]["test_attempted"] = True
-
-    if metrics["compilation"]["success"] and os.path.exists(module_ko_path):
-        functional_results = functional_test_driver(
-            module_ko_path,
-            driver_name_stem,
-            output_dir,
-            expected_load_msg,
-            expected_unload_msg
-        )
-        metrics["functionality"].update(functional_results)
-    else:
-        logger.warning("  Skipping functional testing: Module did not compile successfully or .ko file missing.")
-        if not os.path.exists(module_ko_path):
-            logger.warning("  Score penalty: Functional test skipped because .ko file was not truly available for `insmod`.")
-            metrics["functionality"]["load_success"] = False
-        else:
-            logger.warning("  Score penalty: Functional test not attempted (due to compilation issues).")
-
-
-    # --- Step 6.5: Calculate Detailed and Overall Scores ---
-    detailed_metrics = {
-        "correctness": {
-            "weight": 0.4,
-            "compilation_success": 0.0,
-            "functionality_pass": 0.0,
-            "kernel_api_usage": 1.0 
-        },
-        "security_safety": {
-            "weight": 0.25,
-            "memory_safety": 1.0, 
-            "resource_management": 1.0, 
-            "race_conditions": 1.0, 
-            "input_validation": 1.0 
-        },
-        "code_quality": {
-            "weight": 0.2,
-            "style_compliance": 1.0, 
-            "error_handling": 1.0, 
-            "documentation": 0.7, 
-            "maintainability": 0.8 
-        },
-        "performance": {
-            "weight": 0.1,
-            "efficiency": 0.75, 
-            "scalability": 0.6, 
-            "memory_usage": 0.75 
-        },
-        "advanced_features": {
-            "weight": 0.05,
-            "power_management": 0.5, 
-            "device_tree_support": 0.4, 
-            "debug_support": 0.9 
-        }
-    }
-
-    # --- Populate Correctness Scores ---
-    detailed_metrics["correctness"]["compilation_success"] = 1.0 if metrics["compilation"]["success"] else 0.0
-    detailed_metrics["correctness"]["functionality_pass"] = 1.0 if metrics["functionality"]["test_passed"] else 0.0
-
-    api_misuse_penalty = 0
-    api_misuse_issues = len(re.findall(r'linuxkernel-.*:', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    api_misuse_penalty += api_misuse_issues * 0.05 
-    detailed_metrics["correctness"]["kernel_api_usage"] = max(0.0, 1.0 - api_misuse_penalty)
-
-    # --- Populate Security & Safety Scores ---
-    mem_safety_penalty = 0
-    mem_safety_issues = len(re.findall(r'bugprone-(null-dereference|use-after-free|double-free)|clang-analyzer-security.insecureAPI\.memcpy|memory leak', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    mem_safety_penalty += mem_safety_issues * 0.05
-    detailed_metrics["security_safety"]["memory_safety"] = max(0.0, 1.0 - mem_safety_penalty)
-
-    resource_mgmt_penalty = 0
-    resource_mgmt_issues = len(re.findall(r'resource leak|unhandled return value', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    resource_mgmt_penalty += resource_mgmt_issues * 0.05
-    detailed_metrics["security_safety"]["resource_management"] = max(0.0, 1.0 - resource_mgmt_penalty)
-
-    race_cond_penalty = 0
-    race_cond_issues = len(re.findall(r'concurrency-.*|race condition', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    race_cond_penalty += race_cond_issues * 0.05
-    detailed_metrics["security_safety"]["race_conditions"] = max(0.0, 1.0 - race_cond_penalty)
-
-    input_val_penalty = 0
-    input_val_issues = len(re.findall(r'clang-analyzer-security.insecureAPI|buffer-overflow|bounds check', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE))
-    input_val_penalty += input_val_issues * 0.05
-    detailed_metrics["security_safety"]["input_validation"] = max(0.0, 1.0 - input_val_penalty)
-
-
-    # --- Populate Code Quality Scores ---
-    style_compliance_score = 1.0
-    if CHECKPATCH_SCRIPT and os.path.exists(CHECKPATCH_SCRIPT) and os.access(CHECKPATCH_SCRIPT, os.X_OK):
-        style_compliance_score -= (metrics["style"]["errors_count"] * 0.01) 
-        style_compliance_score -= (metrics["style"]["warnings_count"] * 0.005) 
-    detailed_metrics["code_quality"]["style_compliance"] = max(0.0, style_compliance_score)
-
-    error_handling_score = 1.0
-    error_handling_score -= (metrics["compilation"]["warnings_count"] * 0.005)
-    error_handling_issues = len(re.findall(r'error handling|return value ignored', metrics["static_analysis"]["output"], re.IGNORECASE | re.MULTILINE)) 
-    error_handling_score -= error_handling_issues * 0.02
-    detailed_metrics["code_quality"]["error_handling"] = max(0.0, error_handling_score)
-
-    # Documentation and Maintainability are largely subjective/require more advanced tools. Keeping defaults.
-
-
-    # --- Calculate Overall Score based on new weighted metrics ---
-    overall_score_sum = 0
-    for category_name, category_data in detailed_metrics.items():
-        if category_name in ["overall_score"]: 
-            continue 
-
-        weight = category_data.get("weight", 0)
-        category_sub_score_sum = 0
-        sub_criteria_count = 0
-        
-        for key, value in category_data.items():
-            if key != "weight": 
-                category_sub_score_sum += value
-                sub_criteria_count += 1
-        
-        if sub_criteria_count > 0:
-            overall_score_sum += (category_sub_score_sum / sub_criteria_count) * weight
-        else:
-            logger.warning(f"Category '{category_name}' has no sub-criteria for scoring. Check detailed_metrics definition.")
-
-    final_calculated_score = overall_score_sum * 100
-    detailed_metrics["overall_score"] = round(final_calculated_score, 2)
-
-    metrics["detailed_scores"] = detailed_metrics
-    metrics["overall_score"] = detailed_metrics["overall_score"]
-
-    logger.info(f"  Overall Score for {driver_filename}: {metrics['overall_score']}/100")
-
-    report_path_json = os.path.join(output_dir, "report.json")
-    with open(report_path_json, "w") as f:
-        json.dump(metrics, f, indent=4)
-    logger.info(f"  Individual report saved to {report_path_json}")
-
-    return metrics
-
-
 
 
 def print_driver_summary(metrics):
@@ -1779,19 +1263,34 @@ def generate_fine_tuning_suggestions(all_results):
     if total_drivers == 0:
         return ["No drivers evaluated. Unable to provide suggestions."]
 
-    # Aggregate common issues
-    failed_compilation_count = sum(1 for r in all_results if not r["compilation"]["success"])
-    total_compile_errors = sum(r["compilation"]["errors_count"] for r in all_results)
-    total_compile_warnings = sum(r["compilation"]["warnings_count"] for r in all_results)
-    total_style_errors = sum(r["style"]["errors_count"] for r in all_results)
-    total_style_warnings = sum(r["style"]["warnings_count"] for r in all_results)
-    total_static_analysis_issues = sum(r["static_analysis"]["issues_count"] for r in all_results)
-    
-    failed_load_count = sum(1 for r in all_results if r["functionality"]["test_attempted"] and not r["functionality"]["load_success"])
-    failed_unload_count = sum(1 for r in all_results if r["functionality"]["load_success"] and not r["functionality"]["unload_success"])
-    oops_detected_count = sum(1 for r in all_results if r["functionality"]["kernel_oops_detected"])
-    missing_load_msg_count = sum(1 for r in all_results if r["functionality"]["test_attempted"] and r["functionality"]["load_success"] and not r["functionality"]["load_msg_found"])
-    missing_unload_msg_count = sum(1 for r in all_results if r["functionality"]["test_attempted"] and r["functionality"]["unload_success"] and not r["functionality"]["unload_msg_found"])
+    # Aggregate common issues in a single pass over the results
+    failed_compilation_count = total_compile_errors = total_compile_warnings = 0
+    total_style_errors = total_style_warnings = total_static_analysis_issues = 0
+    failed_load_count = failed_unload_count = oops_detected_count = 0
+    missing_load_msg_count = missing_unload_msg_count = 0
+    outdated_proc_api = False
+    for r in all_results:
+        compilation = r["compilation"]
+        functionality = r["functionality"]
+        failed_compilation_count += not compilation["success"]
+        total_compile_errors += compilation["errors_count"]
+        total_compile_warnings += compilation["warnings_count"]
+        total_style_errors += r["style"]["errors_count"]
+        total_style_warnings += r["style"]["warnings_count"]
+        total_static_analysis_issues += r["static_analysis"]["issues_count"]
+
+        attempted = functionality["test_attempted"]
+        loaded = functionality["load_success"]
+        unloaded = functionality["unload_success"]
+        failed_load_count += attempted and not loaded
+        failed_unload_count += loaded and not unloaded
+        oops_detected_count += bool(functionality["kernel_oops_detected"])
+        missing_load_msg_count += attempted and loaded and not functionality["load_msg_found"]
+        missing_unload_msg_count += attempted and unloaded and not functionality["unload_msg_found"]
+
+        if not outdated_proc_api:
+            compile_output = compilation["output"]
+            outdated_proc_api = "proc_create" in compile_output and "proc_ops" in compile_output
 
 
     # General suggestions
@@ -1804,12 +1303,13 @@ def generate_fine_tuning_suggestions(all_results):
     
     if CHECKPATCH_SCRIPT and (total_style_errors > 0 or total_style_warnings > 0):
         suggestions.append(f"Model needs improvement in Linux kernel coding style (total {total_style_errors} errors, {total_style_warnings} warnings from checkpatch.pl). Focus on:")
-        checkpatch_output_combined = "".join(r["style"]["output"] for r in all_results)
-        if "LINE_LENGTH_80" in checkpatch_output_combined:
+        # Scan each driver's output in place rather than concatenating them all
+        checkpatch_outputs = [r["style"]["output"] for r in all_results]
+        if any("LINE_LENGTH_80" in output for output in checkpatch_outputs):
             suggestions.append("  - Adhering to the 80-character line length limit. Ensure proper line wrapping.")
-        if "BRACES" in checkpatch_output_combined:
+        if any("BRACES" in output for output in checkpatch_outputs):
             suggestions.append("  - Correct brace placement (opening brace on same line as function/control statement).")
-        if "SPACING" in checkpatch_output_combined.lower() or "indentation" in checkpatch_output_combined.lower():
+        if any(CHECKPATCH_SPACING_RE.search(output) for output in checkpatch_outputs):
             suggestions.append("  - Consistent indentation (tabs not spaces) and proper spacing around operators.")
         suggestions.append("  - Reviewing variable naming conventions and proper use of 'static' and 'const'.")
     elif not CHECKPATCH_SCRIPT:
@@ -1818,14 +1318,21 @@ def generate_fine_tuning_suggestions(all_results):
 
     if total_static_analysis_issues > 0:
         suggestions.append(f"Model generates code with static analysis issues (total {total_static_analysis_issues} issues from clang-tidy). Focus on:")
-        clang_output_combined = "".join(r["static_analysis"]["output"] for r in all_results)
-        if "unhandled return value" in clang_output_combined.lower() or "NULL check" in clang_output_combined.lower():
+        found_keywords = set()
+        keyword_matches = itertools.chain.from_iterable(
+            CLANG_TIDY_SUGGESTION_KEYWORDS_RE.finditer(r["static_analysis"]["output"]) for r in all_results
+        )
+        for keyword_match in keyword_matches:
+            found_keywords.add(keyword_match.group(0).lower())
+            if len(found_keywords) == len(CLANG_TIDY_SUGGESTION_KEYWORDS):
+                break # Every suggestion is already triggered; no need to scan the rest
+        if found_keywords & ERROR_HANDLING_KEYWORDS:
             suggestions.append("  - Robust error handling: Ensure return values from kernel API calls (e.g., kmalloc, register_chrdev, class_create, device_create) are checked for errors.")
-        if "resource leak" in clang_output_combined.lower() or "not freed" in clang_output_combined.lower():
+        if found_keywords & RESOURCE_LEAK_KEYWORDS:
             suggestions.append("  - Resource management: Ensure allocated resources (memory, IRQs, GPIOs, devices, /proc entries) are properly freed/released in all exit paths, especially in module_exit and error handlers.")
-        if "concurrency" in clang_output_combined.lower() or "race condition" in clang_output_combined.lower() or "shared data" in clang_output_combined.lower():
+        if found_keywords & CONCURRENCY_KEYWORDS:
              suggestions.append("  - Concurrency safety: Pay attention to race conditions and ensure shared data structures are protected with appropriate locking mechanisms (e.g., mutexes, spinlocks, atomic_t).")
-        if "use after free" in clang_output_combined.lower():
+        if "use after free" in found_keywords:
             suggestions.append("  - Memory safety: Avoid use-after-free and double-free issues.")
         suggestions.append("  - General code correctness and adherence to kernel API usage patterns.")
 
@@ -1842,9 +1349,9 @@ def generate_fine_tuning_suggestions(all_results):
         suggestions.append(f"Model often generates modules that fail to unload ({failed_unload_count}/{total_drivers} drivers). Ensure `module_exit` correctly unregisters and frees all allocated resources.")
     
     if missing_load_msg_count > 0 or missing_unload_msg_count > 0:
-        suggestions.append(f"Model sometimes misses expected printk messages ({missing_load_msg_count} load, {missing_unload_msg_count} unload). **Crucially, ensure appropriate `printk` messages are used for module lifecycle events, matching the expected format like '{SCENARIO_MAP[0]['filename'].split('.')[0]}: registered with major' and '{SCENARIO_MAP[0]['filename'].split('.')[0]}: unregistered'.**")
+        suggestions.append(f"Model sometimes misses expected printk messages ({missing_load_msg_count} load, {missing_unload_msg_count} unload). **Crucially, ensure appropriate `printk` messages are used for module lifecycle events, matching the expected format like '{EXAMPLE_MODULE_NAME}: registered with major' and '{EXAMPLE_MODULE_NAME}: unregistered'.**")
     
-    if any("proc_create" in r["compilation"]["output"] and "proc_ops" in r["compilation"]["output"] for r in all_results):
+    if outdated_proc_api:
         suggestions.append("Specific: The AI is using an outdated API for '/proc' filesystem entries (e.g., `proc_create`). It needs to use `const struct proc_ops *` instead of `struct file_operations *` for `proc_create` in modern kernels.")
 
 
@@ -1889,64 +1396,48 @@ if __name__ == "__main__":
 
     logger.info(f"Found {len(parsed_drivers)} driver code blocks.")
 
-    # --- Dispatcher for evaluation functions ---
-    evaluation_functions = {
-        "char_device_basic_rw": evaluate_char_rw_driver,
-        "char_device_ioctl_sync": evaluate_char_ioctl_sync_driver,
-        "platform_device_gpio_irq": evaluate_platform_gpio_irq_driver,
-        "char_device_procfs": evaluate_char_procfs_driver,
-        "generic_kernel_module": evaluate_hello_module_driver,
-    }
-
-    for i, driver_info in enumerate(parsed_drivers):
-        driver_filename = driver_info['filename']
-        driver_code_content = driver_info['code_content']
-        final_category = driver_info['category']
+    try:
+        with open(TEMPLATE_MAKEFILE, 'r') as tmpl_f:
+            makefile_template = tmpl_f.read()
+    except FileNotFoundError:
+        logger.error(f"Error: Template Makefile '{TEMPLATE_MAKEFILE}' not found. Please ensure it exists.")
+        exit(1)
 
-        file_eval_dir = os.path.join(current_run_dir, "results", os.path.splitext(driver_filename)[0])
-        os.makedirs(file_eval_dir, exist_ok=True)
-        
-        driver_target_path = os.path.join(file_eval_dir, driver_filename)
-        with open(driver_target_path, "w") as f:
-            f.write(driver_code_content)
-        logger.info(f"  Copied '{driver_filename}' to its evaluation directory.")
+    results_dir = os.path.join(current_run_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    prepared_drivers = [
+        prepare_driver_dir(driver_info, results_dir, makefile_template)
+        for driver_info in parsed_drivers
+    ]
 
-        makefile_target_path = os.path.join(file_eval_dir, "Makefile")
-        try:
-            with open(TEMPLATE_MAKEFILE, 'r') as tmpl_f:
-                makefile_content = tmpl_f.read()
-            makefile_content = makefile_content.replace("$(DRIVER_NAME)", os.path.splitext(driver_filename)[0])
-            with open(makefile_target_path, "w") as mf:
-                mf.write(makefile_content)
-            logger.info(f"  Created Makefile for '{driver_filename}'.")
-        except FileNotFoundError:
-            logger.error(f"Error: Template Makefile '{TEMPLATE_MAKEFILE}' not found. Please ensure it exists.")
-            exit(1)
-        except Exception as e:
-            logger.error(f"Error creating Makefile for '{driver_filename}': {e}", exc_info=True)
-            exit(1)
-
-        logger.info(f"Automatically detected '{driver_filename}' as: {final_category}")
-
-        evaluation_func = evaluation_functions.get(final_category)
-        if evaluation_func:
-            file_metrics = evaluation_func(driver_target_path, file_eval_dir, final_category)
+    # Lint every driver up front in a few batched checkpatch.pl processes
+    checkpatch_results = {}
+    if CHECKPATCH_AVAILABLE:
+        checkpatch_results = run_checkpatch_batch([driver_path for driver_path, _ in prepared_drivers])
+
+    # --- Evaluate drivers in parallel; functional tests stay serialized ---
+    functional_test_lock = multiprocessing.Lock()
+    cpu_count = os.cpu_count() or 1
+    worker_count = max(1, min(cpu_count, len(prepared_drivers)))
+    with ProcessPoolExecutor(
+        max_workers=worker_count,
+        initializer=init_evaluation_worker,
+        initargs=(functional_test_lock, max(1, cpu_count // worker_count))
+    ) as executor:
+        futures = [
+            executor.submit(
+                evaluate_parsed_driver, driver_info, driver_path, file_eval_dir,
+                checkpatch_results.get(driver_path)
+            )
+            for driver_info, (driver_path, file_eval_dir) in zip(parsed_drivers, prepared_drivers)
+        ]
+        # Collect in submission order so the summaries and table keep SCENARIO_MAP order
+        for future in futures:
+            file_metrics = future.result()
             all_driver_results.append(file_metrics)
             overall_model_scores.append(file_metrics["overall_score"])
-            print_driver_summary(file_metrics)
-        else:
-            logger.error(f"No evaluation function defined for category: {final_category}. Skipping {driver_filename}.")
-            all_driver_results.append({
-                "filename": driver_filename, "category": final_category,
-                "compilation": {"success": False, "errors_count": 99, "warnings_count": 0, "output": "No evaluation function."},
-                "style": {"warnings_count": 0, "errors_count": 0, "output": ""},
-                "static_analysis": {"issues_count": 0, "output": ""},
-                "functionality": {"test_attempted": False, "load_success": False, "unload_success": False,
-                                  "kernel_oops_detected": False, "load_msg_found": False, "unload_msg_found": False,
-                                  "test_passed": False, "dmesg_output_load": "", "dmesg_output_unload": ""},
-                "overall_score": 0
-            })
-            overall_model_scores.append(0)
+            if file_metrics["category"] in EXPECTED_MODULE_MESSAGES:
+                print_driver_summary(file_metrics)
 
 
     print("\n" + "="*80)
@@ -1959,9 +1450,7 @@ if __name__ == "__main__":
         print("Detailed Results:")
         header = "| Driver Name        | Category                 | Compile | Style (E/W) | SA (Issues) | Func Test | Score |"
         separator = "|--------------------|--------------------------|---------|-------------|-------------|-----------|-------|"
-        print(header)
-        print(separator)
-        
+        table_lines = [header, separator]
         for r in all_driver_results:
             compile_status = "PASS" if r["compilation"]["success"] else "FAIL"
             style_status = f"{r['style']['errors_count']}/{r['style']['warnings_count']}"
@@ -1970,15 +1459,17 @@ if __name__ == "__main__":
             if r["functionality"]["test_attempted"]:
                 func_test_status = "PASS" if r["functionality"]["test_passed"] else "FAIL"
 
-            print(f"| {r['filename']:<18} | {r['category']:<24} | {compile_status:<7} | {style_status:<11} | {sa_issues:<11} | {func_test_status:<9} | {r['overall_score']:<5} |")
-        print(separator)
+            table_lines.append(RESULTS_ROW_FORMAT.format(
+                r["filename"], r["category"], compile_status, style_status, sa_issues, func_test_status, r["overall_score"]
+            ))
+        table_lines.append(separator)
+        print("\n".join(table_lines))
 
         print("\n" + "="*80)
         print("             Model Fine-tuning Suggestions")
         print("="*80)
         suggestions = generate_fine_tuning_suggestions(all_driver_results)
-        for s in suggestions:
-            print(f"- {s}")
+        print("\n".join(f"- {s}" for s in suggestions))
         print("="*80)
 
 
@@ -1987,10 +1478,9 @@ if __name__ == "__main__":
             "timestamp": timestamp,
             "overall_average_score": overall_model_average_score,
             "fine_tuning_suggestions": suggestions,
-            "individual_driver_results": all_driver_results
+            "individual_driver_results": [metrics_for_report(r) for r in all_driver_results]
         }
-        with open(summary_report_path, "w") as f:
-            json.dump(summary_data, f, indent=4)
+        write_json_report(summary_data, summary_report_path)
         logger.info(f"\nComprehensive summary report saved to: {summary_report_path}")
 
     else:
@@ -0,0 +1,59 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from evaluate_drivers import SCENARIO_MAP, parse_ai_output_file
+
+
+def build_ai_output(bodies):
+    """
+    Builds an AI output file with one START/END block per scenario, in SCENARIO_MAP order.
+
+    Args:
+        bodies (dict): {tag: code lines} overriding the default one-line body.
+    """
+    lines = []
+    for scenario in SCENARIO_MAP:
+        tag = scenario["tag"]
+        lines.append(f"// START:{tag}")
+        lines.extend(bodies.get(tag, [f"int {tag}_value;"]))
+        lines.append(f"// END:{tag}")
+    return "\n".join(lines) + "\n"
+
+
+class ParseAiOutputFileTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def parse(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+        return {d["filename"]: d["code_content"] for d in parse_ai_output_file(self.path)}
+
+    def test_parses_every_scenario(self):
+        drivers = self.parse(build_ai_output({}))
+        self.assertEqual(len(drivers), len(SCENARIO_MAP))
+        self.assertEqual(drivers["hello_module.c"], "int hello_module_value;")
+
+    def test_duplicate_start_line_starts_a_new_block(self):
+        # A stray repeated START line: the code begins after the last one
+        drivers = self.parse(build_ai_output({"hello_module": ["stray text", "// START:hello_module", "int b;"]}))
+        self.assertEqual(drivers["hello_module.c"], "int b;")
+
+    def test_mismatched_end_line_is_dropped(self):
+        drivers = self.parse(build_ai_output({"char_rw": ["int a;", "// END:x", "int b;"]}))
+        self.assertEqual(drivers["char_rw.c"], "int a;\nint b;")
+        self.assertNotIn("END:", drivers["char_rw.c"])
+
+    def test_start_line_with_trailing_text_is_code(self):
+        drivers = self.parse(build_ai_output({"char_rw": ["// START:char_rw is here", "int a;"]}))
+        self.assertEqual(drivers["char_rw.c"], "// START:char_rw is here\nint a;")
+
+
+if __name__ == "__main__":
+    unittest.main()
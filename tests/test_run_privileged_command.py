@@ -0,0 +1,114 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import evaluate_drivers
+from evaluate_drivers import read_dmesg_since, run_privileged_command
+
+
+class RootShellTestCase(unittest.TestCase):
+    """Drives the persistent shell with a plain bash standing in for sudo bash."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        patcher = mock.patch.object(evaluate_drivers, "SUDO_SHELL_COMMAND", ["bash"])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        evaluate_drivers.SUDO_SHELL = None
+        self.addCleanup(self.stop_shell)
+
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(work_dir.name)
+        os.makedirs(os.path.join("results", "driver"))
+
+    def stop_shell(self):
+        shell = evaluate_drivers.SUDO_SHELL
+        if shell is not None:
+            shell.stdin.close()
+            shell.wait()
+            shell.stdout.close()
+            evaluate_drivers.SUDO_SHELL = None
+
+
+class RunPrivilegedCommandTest(RootShellTestCase):
+    def test_relative_cwd_is_used_for_every_call(self):
+        expected = os.path.realpath(os.path.join("results", "driver"))
+        for _ in range(3):
+            returncode, stdout, stderr = run_privileged_command(["pwd", "-P"], cwd="results/driver", description="pwd")
+            self.assertEqual((returncode, stdout, stderr), (0, expected + "\n", ""))
+
+    def test_returns_stdout_stderr_and_exit_code(self):
+        returncode, stdout, stderr = run_privileged_command(
+            ["bash", "-c", "printf out; echo err >&2; exit 3"], cwd="results", description="mixed output"
+        )
+        self.assertEqual((returncode, stdout, stderr), (3, "out", "err\n"))
+
+        returncode, stdout, stderr = run_privileged_command(["true"], cwd="results", description="true")
+        self.assertEqual((returncode, stdout, stderr), (0, "", ""))
+
+    def test_missing_cwd_fails_only_that_call(self):
+        returncode, _, stderr = run_privileged_command(["true"], cwd="missing", description="bad cwd")
+        self.assertNotEqual(returncode, 0)
+        self.assertIn("missing", stderr)
+
+        returncode, _, _ = run_privileged_command(["true"], cwd="results", description="true")
+        self.assertEqual(returncode, 0)
+
+
+class ReadDmesgSinceTest(RootShellTestCase):
+    def setUp(self):
+        super().setUp()
+        # A dmesg stand-in that prints the kernel log kept in kernel.log
+        os.mkdir("bin")
+        with open(os.path.join("bin", "dmesg"), "w") as f:
+            f.write(f"#!/bin/sh\nexec cat {os.path.abspath('kernel.log')}\n")
+        os.chmod(os.path.join("bin", "dmesg"), 0o755)
+        env_patcher = mock.patch.dict(os.environ, {"PATH": os.path.abspath("bin") + os.pathsep + os.environ["PATH"]})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+        self.log("[    0.000000] Booting Linux\n[12345.123456] old: device registered\n")
+
+    def log(self, text):
+        with open("kernel.log", "a") as f:
+            f.write(text)
+
+    def test_returns_only_records_after_the_mark(self):
+        output, mark = read_dmesg_since("-1", "results", "before load", keep_output=False)
+        self.assertEqual((output, mark), ("", "12345.123456"))
+
+        self.log("[12345.123457] char_rw: device registered\n  continuation line\n")
+        output, mark = read_dmesg_since(mark, "results", "after load")
+        self.assertEqual(output, "[12345.123457] char_rw: device registered\n  continuation line\n")
+        self.assertEqual(mark, "12345.123457")
+
+        output, mark = read_dmesg_since(mark, "results", "nothing new")
+        self.assertEqual((output, mark), ("", "12345.123457"))
+
+    def test_output_is_capped_to_its_tail(self):
+        _, mark = read_dmesg_since("-1", "results", "before load", keep_output=False)
+        self.log("".join(f"[12346.{i:06d}] flood line {i}\n" for i in range(100)))
+        with mock.patch.object(evaluate_drivers, "DMESG_TAIL_BYTES", 64):
+            output, new_mark = read_dmesg_since(mark, "results", "after load")
+        self.assertEqual(len(output), 64)
+        self.assertTrue(output.endswith("[12346.000099] flood line 99\n"))
+        self.assertEqual(new_mark, "12346.000099")
+
+    def test_empty_log_returns_everything_logged_later(self):
+        os.remove("kernel.log")
+        self.log("")
+        output, mark = read_dmesg_since("-1", "results", "before load", keep_output=False)
+        self.assertEqual((output, mark), ("", "-1"))
+
+        self.log("[    0.000000] first\n")
+        output, _ = read_dmesg_since(mark, "results", "after load")
+        self.assertEqual(output, "[    0.000000] first\n")
+
+
+if __name__ == "__main__":
+    unittest.main()